@@ -0,0 +1,323 @@
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import unicodedata
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from .config import CACHE_DIR
+
+
+def normalize_query(text: str) -> str:
+    """Normalize a query so near-identical variants share one cache key."""
+    text = unicodedata.normalize("NFKC", text or "")
+    return " ".join(text.lower().split())
+
+
+class SQLiteCache:
+    """
+    Small persistent key/value cache backed by SQLite.
+
+    - Values are stored as JSON.
+    - Entries older than `ttl` seconds are treated as missing.
+    - When more than `max_entries` are stored for a namespace, the least
+      recently used ones are evicted.
+    - `bypass=True` skips reads (always a miss) but still stores fresh values,
+      which is handy for forcing a refresh.
+
+    Several namespaces can share one database file.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        ttl: float,
+        max_entries: int,
+        path: Optional[str] = None,
+        bypass: bool = False,
+    ) -> None:
+        self.namespace = namespace
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.bypass = bypass
+        self.path = path or os.path.join(CACHE_DIR, "cache.sqlite3")
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " namespace TEXT NOT NULL,"
+                " key TEXT NOT NULL,"
+                " value TEXT NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " accessed_at REAL NOT NULL,"
+                " PRIMARY KEY (namespace, key))"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS entries_lru "
+                "ON entries (namespace, accessed_at)"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value, or None on a miss / expiry / bypass."""
+        if self.bypass:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._connect()
+                row = conn.execute(
+                    "SELECT value, created_at FROM entries WHERE namespace = ? AND key = ?",
+                    (self.namespace, key),
+                ).fetchone()
+
+                if row is None or now - row[1] > self.ttl:
+                    if row is not None:
+                        conn.execute(
+                            "DELETE FROM entries WHERE namespace = ? AND key = ?",
+                            (self.namespace, key),
+                        )
+                        conn.commit()
+                    self.misses += 1
+                    return None
+
+                conn.execute(
+                    "UPDATE entries SET accessed_at = ? WHERE namespace = ? AND key = ?",
+                    (now, self.namespace, key),
+                )
+                conn.commit()
+                self.hits += 1
+            return json.loads(row[0])
+        except Exception as e:
+            print(f"[cache:{self.namespace}] Read error: {repr(e)}")
+            with self._lock:
+                self.misses += 1
+            return None
+
+    def set(self, key: str, value: Any) -> None:
+        """Store a JSON-serialisable value and evict LRU entries over the limit."""
+        now = time.time()
+        try:
+            payload = json.dumps(value)
+            with self._lock:
+                conn = self._connect()
+                conn.execute(
+                    "INSERT OR REPLACE INTO entries "
+                    "(namespace, key, value, created_at, accessed_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (self.namespace, key, payload, now, now),
+                )
+                conn.execute(
+                    "DELETE FROM entries WHERE namespace = ? AND key IN ("
+                    " SELECT key FROM entries WHERE namespace = ?"
+                    " ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                    (self.namespace, self.namespace, max(0, self.max_entries)),
+                )
+                conn.commit()
+        except Exception as e:
+            print(f"[cache:{self.namespace}] Write error: {repr(e)}")
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
+
+
+@dataclass
+class CachedDocument:
+    url: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    content_hash: str
+    kind: str
+    extractor: str
+    text: str
+
+
+class DocumentStore:
+    """
+    Local store of fetched documents, keyed by URL.
+
+    - Raw bytes are kept content-addressed on disk (`<root>/blobs/<sha256>`),
+      so mirrored copies of one file are stored once.
+    - SQLite keeps, per URL: content hash, ETag, Last-Modified, the extracted
+      text and which extractor produced it.
+    - When the total size goes above `max_bytes`, least recently used
+      documents are evicted.
+    """
+
+    def __init__(self, max_bytes: int, root: Optional[str] = None) -> None:
+        self.max_bytes = max_bytes
+        self.root = root or os.path.join(CACHE_DIR, "documents")
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.join(self.root, "blobs"), exist_ok=True)
+            conn = sqlite3.connect(
+                os.path.join(self.root, "documents.sqlite3"),
+                timeout=30,
+                check_same_thread=False,
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS documents ("
+                " url TEXT PRIMARY KEY,"
+                " etag TEXT,"
+                " last_modified TEXT,"
+                " content_hash TEXT NOT NULL,"
+                " kind TEXT NOT NULL,"
+                " extractor TEXT NOT NULL,"
+                " text TEXT NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " accessed_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS documents_hash ON documents (content_hash)"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def _blob_path(self, content_hash: str) -> str:
+        return os.path.join(self.root, "blobs", content_hash)
+
+    def lookup(self, url: str) -> Optional[CachedDocument]:
+        """Stored entry for `url` (used for conditional request headers)."""
+        try:
+            with self._lock:
+                row = self._connect().execute(
+                    "SELECT url, etag, last_modified, content_hash, kind, extractor, text "
+                    "FROM documents WHERE url = ?",
+                    (url,),
+                ).fetchone()
+            return CachedDocument(*row) if row else None
+        except Exception as e:
+            print(f"[document_store] Read error: {repr(e)}")
+            return None
+
+    def text_for_hash(self, content_hash: str, extractor: str) -> Optional[str]:
+        """Extracted text of any stored document with these exact bytes."""
+        try:
+            with self._lock:
+                row = self._connect().execute(
+                    "SELECT text FROM documents WHERE content_hash = ? AND extractor = ? LIMIT 1",
+                    (content_hash, extractor),
+                ).fetchone()
+            return row[0] if row else None
+        except Exception as e:
+            print(f"[document_store] Read error: {repr(e)}")
+            return None
+
+    def touch(
+        self,
+        url: str,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ) -> None:
+        """Mark `url` as used and refresh its validators (e.g. after a 304)."""
+        try:
+            with self._lock:
+                conn = self._connect()
+                conn.execute(
+                    "UPDATE documents SET accessed_at = ?,"
+                    " etag = COALESCE(?, etag),"
+                    " last_modified = COALESCE(?, last_modified)"
+                    " WHERE url = ?",
+                    (time.time(), etag, last_modified, url),
+                )
+                conn.commit()
+        except Exception as e:
+            print(f"[document_store] Write error: {repr(e)}")
+
+    def store(
+        self,
+        url: str,
+        content_hash: str,
+        kind: str,
+        extractor: str,
+        text: str,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+        raw: Optional[bytes] = None,
+        raw_path: Optional[str] = None,
+    ) -> None:
+        """Save a document's raw bytes (from `raw` or a file at `raw_path`) and text."""
+        try:
+            blob = self._blob_path(content_hash)
+            with self._lock:
+                conn = self._connect()
+                if not os.path.exists(blob):
+                    tmp_blob = f"{blob}.{threading.get_ident()}.tmp"
+                    if raw_path is not None:
+                        shutil.copyfile(raw_path, tmp_blob)
+                    else:
+                        with open(tmp_blob, "wb") as f:
+                            f.write(raw or b"")
+                    os.replace(tmp_blob, blob)
+
+                size = os.path.getsize(blob) + len(text.encode("utf-8"))
+                conn.execute(
+                    "INSERT OR REPLACE INTO documents "
+                    "(url, etag, last_modified, content_hash, kind, extractor, text, size, accessed_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (url, etag, last_modified, content_hash, kind, extractor, text, size, time.time()),
+                )
+                conn.commit()
+                self._evict(conn)
+        except Exception as e:
+            print(f"[document_store] Write error: {repr(e)}")
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM documents").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        rows = conn.execute(
+            "SELECT url, content_hash, size FROM documents ORDER BY accessed_at ASC"
+        ).fetchall()
+        for url, content_hash, size in rows:
+            if total <= self.max_bytes:
+                break
+            conn.execute("DELETE FROM documents WHERE url = ?", (url,))
+            still_used = conn.execute(
+                "SELECT 1 FROM documents WHERE content_hash = ? LIMIT 1", (content_hash,)
+            ).fetchone()
+            if not still_used:
+                try:
+                    os.remove(self._blob_path(content_hash))
+                except FileNotFoundError:
+                    pass
+            total -= size
+        conn.commit()
+
+    def count(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
@@ -3,7 +3,189 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+
+def _env_flag(name: str, default: str = "") -> bool:
+    return os.getenv(name, default).strip().lower() in ("1", "true", "yes", "on")
+
+
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 TAVILY_API_KEY = os.getenv("TAVILY_API_KEY")
 FIRECRAWL_API_KEY = os.getenv("FIRECRAWL_API_KEY")
-SERPAPI_API_KEY = os.getenv("SERPAPI_API_KEY")
\ No newline at end of file
+SERPAPI_API_KEY = os.getenv("SERPAPI_API_KEY")
+
+# PIPELINE_MODE=streaming runs each record through search → scrape → summarize
+# → verify on its own (bounded queues of PIPELINE_QUEUE_SIZE between stages,
+# per-stage worker counts below) instead of finishing every stage for all
+# records first ("staged"). Streaming skips the CLI's link approval step.
+PIPELINE_MODE = os.getenv("PIPELINE_MODE", "staged").lower()
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "4"))
+PIPELINE_SEARCH_WORKERS = int(os.getenv("PIPELINE_SEARCH_WORKERS", "4"))
+PIPELINE_SCRAPE_WORKERS = int(os.getenv("PIPELINE_SCRAPE_WORKERS", "8"))
+PIPELINE_SUMMARIZE_WORKERS = int(os.getenv("PIPELINE_SUMMARIZE_WORKERS", "8"))
+PIPELINE_VERIFY_WORKERS = int(os.getenv("PIPELINE_VERIFY_WORKERS", "8"))
+
+# CLI only: while the analyst reviews the strategy list and the links, search
+# links for the proposed strategies and scrape the found pages in the
+# background; removed or rejected entries are cancelled.
+SPECULATIVE_PREFETCH = _env_flag("SPECULATIVE_PREFETCH", "1")
+
+# Run instrumentation: JSON report written at the end of a run, and an optional
+# Prometheus text endpoint (http://127.0.0.1:METRICS_PORT/metrics, 0 = off).
+RUN_REPORT_PATH = os.getenv("RUN_REPORT_PATH", "run_report.json")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+
+# Strategy list generation: how many countries to ask for. Up to
+# SELECTOR_SHARD_SIZE are generated in one prompt; more are split into parallel
+# prompts by region and merged, dropping repeated country / strategy pairs:
+# same content words and years, where words at least SELECTOR_DEDUPE_SIMILARITY
+# alike (typos) count as the same.
+SELECTOR_MAX_COUNTRIES = int(os.getenv("SELECTOR_MAX_COUNTRIES", "10"))
+SELECTOR_SHARD_SIZE = int(os.getenv("SELECTOR_SHARD_SIZE", "10"))
+SELECTOR_DEDUPE_SIMILARITY = float(os.getenv("SELECTOR_DEDUPE_SIMILARITY", "0.85"))
+
+# Link search concurrency: how many records are searched at once, and how many
+# calls each provider may have in flight at the same time.
+SEARCH_CONCURRENCY = int(os.getenv("SEARCH_CONCURRENCY", "8"))
+SERPAPI_MAX_CONCURRENCY = int(os.getenv("SERPAPI_MAX_CONCURRENCY", "4"))
+TAVILY_MAX_CONCURRENCY = int(os.getenv("TAVILY_MAX_CONCURRENCY", "4"))
+FIRECRAWL_MAX_CONCURRENCY = int(os.getenv("FIRECRAWL_MAX_CONCURRENCY", "2"))
+
+# How providers are combined per query:
+#   "fallback" – SerpAPI, then Tavily, then Firecrawl, each only if the previous found nothing
+#   "hedged"   – start SerpAPI, launch the next provider after SEARCH_HEDGE_DELAY seconds
+#                (or as soon as one comes back empty); first non-empty result wins
+#   "merge"    – query all providers at once and fuse their rankings
+SEARCH_MODE = os.getenv("SEARCH_MODE", "fallback").lower()
+SEARCH_HEDGE_DELAY = float(os.getenv("SEARCH_HEDGE_DELAY", "2.0"))
+
+# On-disk caches (SQLite) live here.
+CACHE_DIR = os.getenv("CACHE_DIR", ".cache")
+
+# Search-result cache: entries expire after SEARCH_CACHE_TTL seconds, the least
+# recently used are evicted above SEARCH_CACHE_MAX_ENTRIES, and
+# SEARCH_CACHE_BYPASS=1 forces fresh provider calls (results are still stored).
+SEARCH_CACHE_TTL = float(os.getenv("SEARCH_CACHE_TTL", str(7 * 24 * 3600)))
+SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "5000"))
+SEARCH_CACHE_BYPASS = _env_flag("SEARCH_CACHE_BYPASS")
+
+# Link probes: before a primary link is chosen, up to LINK_PROBE_MAX_CANDIDATES
+# search results get a HEAD request (or a small Range GET when HEAD is refused),
+# LINK_PROBE_CONCURRENCY at a time. Status, content type and size feed the
+# ranking; results are cached for LINK_PROBE_CACHE_TTL seconds.
+LINK_PROBE_ENABLED = _env_flag("LINK_PROBE_ENABLED", "1")
+LINK_PROBE_MAX_CANDIDATES = int(os.getenv("LINK_PROBE_MAX_CANDIDATES", "10"))
+LINK_PROBE_CONCURRENCY = int(os.getenv("LINK_PROBE_CONCURRENCY", "16"))
+LINK_PROBE_TIMEOUT = float(os.getenv("LINK_PROBE_TIMEOUT", "5"))
+LINK_PROBE_CACHE_TTL = float(os.getenv("LINK_PROBE_CACHE_TTL", str(24 * 3600)))
+
+# Shared HTTP transport (scraping + SerpAPI): pooled keep-alive connections,
+# per-host connection cap, retries with exponential backoff + jitter on 429/5xx.
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "10"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "25"))
+HTTP_POOL_HOSTS = int(os.getenv("HTTP_POOL_HOSTS", "32"))
+HTTP_MAX_PER_HOST = int(os.getenv("HTTP_MAX_PER_HOST", "4"))
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "3"))
+HTTP_BACKOFF_FACTOR = float(os.getenv("HTTP_BACKOFF_FACTOR", "0.5"))
+HTTP_BACKOFF_JITTER = float(os.getenv("HTTP_BACKOFF_JITTER", "0.5"))
+
+# Streaming downloads: stop reading HTML after SCRAPE_MAX_HTML_BYTES; PDFs are
+# spooled to a temporary file and abandoned beyond SCRAPE_MAX_PDF_BYTES.
+SCRAPE_MAX_HTML_BYTES = int(os.getenv("SCRAPE_MAX_HTML_BYTES", str(2 * 1024 * 1024)))
+SCRAPE_MAX_PDF_BYTES = int(os.getenv("SCRAPE_MAX_PDF_BYTES", str(100 * 1024 * 1024)))
+
+# Scraping engine: downloads run on SCRAPE_IO_WORKERS threads; PDF/HTML parsing
+# runs on SCRAPE_CPU_WORKERS processes (0 = parse on the download threads).
+SCRAPE_IO_WORKERS = int(os.getenv("SCRAPE_IO_WORKERS", "8"))
+SCRAPE_CPU_WORKERS = int(os.getenv("SCRAPE_CPU_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+# Document store: raw bytes + extracted text per URL, revalidated with
+# ETag / Last-Modified; least recently used documents are evicted above
+# DOC_CACHE_MAX_BYTES.
+DOC_CACHE_ENABLED = _env_flag("DOC_CACHE_ENABLED", "1")
+DOC_CACHE_MAX_BYTES = int(os.getenv("DOC_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+
+# HTML → text backend: "bs4" (html.parser), "lxml" (fast, same output shape) or
+# "lxml-main" (lxml + main-content / boilerplate removal).
+HTML_EXTRACTOR = os.getenv("HTML_EXTRACTOR", "bs4").lower()
+
+# PDF page selection: "first" reads the first PDF_MAX_PAGES pages; "relevant"
+# scans the whole document cheaply (bookmarks, page lengths, keyword hits on the
+# strategy name) and extracts the best PDF_MAX_PAGES pages in parallel, stopping
+# at PDF_CHAR_BUDGET characters.
+PDF_PAGE_SELECTION = os.getenv("PDF_PAGE_SELECTION", "first").lower()
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", "5"))
+PDF_CHAR_BUDGET = int(os.getenv("PDF_CHAR_BUDGET", "15000"))
+
+# Per-domain fetch scheduling (AIMD): each host starts with
+# SCRAPE_DOMAIN_INITIAL_WINDOW concurrent requests, grows up to
+# SCRAPE_DOMAIN_MAX_WINDOW while responses stay under
+# SCRAPE_DOMAIN_TARGET_LATENCY seconds, halves on 429/503 and waits out
+# Retry-After. Throttled fetches are retried up to SCRAPE_THROTTLE_RETRIES times.
+SCRAPE_DOMAIN_INITIAL_WINDOW = float(os.getenv("SCRAPE_DOMAIN_INITIAL_WINDOW", "2"))
+SCRAPE_DOMAIN_MAX_WINDOW = float(os.getenv("SCRAPE_DOMAIN_MAX_WINDOW", "4"))
+SCRAPE_DOMAIN_TARGET_LATENCY = float(os.getenv("SCRAPE_DOMAIN_TARGET_LATENCY", "5"))
+SCRAPE_THROTTLE_RETRIES = int(os.getenv("SCRAPE_THROTTLE_RETRIES", "3"))
+
+# Secondary links: up to SCRAPE_SECONDARY_LINKS of a record's secondary_links
+# are fetched alongside the primary one (0 = primary only). Their text is used
+# when the primary fails and is otherwise appended; passages whose SimHash is
+# within SCRAPE_DEDUPE_MAX_DISTANCE bits of one already kept are dropped.
+# Link search keeps SCRAPE_FALLBACK_LINKS more ranked candidates beyond those;
+# they are fetched only for records where no link of the first round worked.
+SCRAPE_SECONDARY_LINKS = int(os.getenv("SCRAPE_SECONDARY_LINKS", "3"))
+SCRAPE_FALLBACK_LINKS = int(os.getenv("SCRAPE_FALLBACK_LINKS", "3"))
+SCRAPE_DEDUPE_MAX_DISTANCE = int(os.getenv("SCRAPE_DEDUPE_MAX_DISTANCE", "12"))
+
+# LLM executor shared by the summarize / verify stages: model, in-flight call
+# limit, requests- and tokens-per-minute budgets, retries on 429 / 5xx.
+# OPENAI_BASE_URL (read by the OpenAI client) can point at a local fake server.
+LLM_MODEL = os.getenv("LLM_MODEL", "gpt-4.1-mini")
+LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "8"))
+LLM_RPM = float(os.getenv("LLM_RPM", "500"))
+LLM_TPM = float(os.getenv("LLM_TPM", "200000"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "5"))
+
+# Model cascade for summarize / verify: LLM_MODEL_TIERS lists models from
+# cheapest to strongest (default: LLM_MODEL only, no cascade). Requests start on
+# the first tier (the second when their input exceeds LLM_ROUTE_LONG_INPUT_TOKENS)
+# and move up a tier when the answer is unusable or uncertain.
+LLM_MODEL_TIERS = [
+    m.strip() for m in os.getenv("LLM_MODEL_TIERS", LLM_MODEL).split(",") if m.strip()
+] or [LLM_MODEL]
+LLM_ROUTE_LONG_INPUT_TOKENS = int(os.getenv("LLM_ROUTE_LONG_INPUT_TOKENS", "6000"))
+
+# LLM_MODE=batch sends summarize / verify through the OpenAI Batch API (cheaper,
+# higher rate limits, results within 24h); the stage waits, polling every
+# LLM_BATCH_POLL_SECONDS, for at most LLM_BATCH_TIMEOUT seconds.
+LLM_MODE = os.getenv("LLM_MODE", "online").lower()
+LLM_BATCH_POLL_SECONDS = float(os.getenv("LLM_BATCH_POLL_SECONDS", "30"))
+LLM_BATCH_TIMEOUT = float(os.getenv("LLM_BATCH_TIMEOUT", str(24 * 3600)))
+
+# Prompt context: "bm25" chunks raw_text and packs the chunks that best match the
+# strategy name / country / research focus into CONTEXT_TOKEN_BUDGET tokens
+# (counted with the CONTEXT_TOKENIZER tiktoken encoding); "truncate" sends the
+# first 8,000 characters.
+CONTEXT_PACKING = os.getenv("CONTEXT_PACKING", "bm25").lower()
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1500"))
+CONTEXT_CHUNK_CHARS = int(os.getenv("CONTEXT_CHUNK_CHARS", "800"))
+CONTEXT_TOKENIZER = os.getenv("CONTEXT_TOKENIZER", "o200k_base")
+
+# SUMMARY_MODE=fused summarizes and verifies in one LLM call per strategy (the
+# model quotes its evidence, which is checked locally) instead of two passes.
+SUMMARY_MODE = os.getenv("SUMMARY_MODE", "separate").lower()
+
+# Local evidence matching before LLM verification: summary sentences whose best
+# source passage scores at least VERIFY_MATCH_THRESHOLD (word-trigram
+# containment + word coverage, 0..1, numbers, negation and direction of change
+# must match) are marked Verified without an API call; the rest go to the LLM
+# with their best VERIFY_EVIDENCE_SNIPPETS passages only.
+VERIFY_LOCAL_MATCH = _env_flag("VERIFY_LOCAL_MATCH", "1")
+VERIFY_MATCH_THRESHOLD = float(os.getenv("VERIFY_MATCH_THRESHOLD", "0.75"))
+VERIFY_EVIDENCE_SNIPPETS = int(os.getenv("VERIFY_EVIDENCE_SNIPPETS", "3"))
+
+# Response cache shared by all LLM stages (scope, selector, summarize, verify),
+# keyed by a hash of model + instructions + prompt.
+LLM_CACHE_ENABLED = _env_flag("LLM_CACHE_ENABLED", "1")
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", str(30 * 24 * 3600)))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "20000"))
+LLM_CACHE_BYPASS = _env_flag("LLM_CACHE_BYPASS")
@@ -0,0 +1,160 @@
+import math
+import re
+from collections import Counter
+from typing import Callable, Dict, List, Optional
+
+from .config import (
+    CONTEXT_PACKING,
+    CONTEXT_TOKEN_BUDGET,
+    CONTEXT_CHUNK_CHARS,
+    CONTEXT_TOKENIZER,
+)
+
+try:
+    import tiktoken
+except ImportError:  # fall back to a character estimate
+    tiktoken = None
+
+
+TRUNCATE_CHARS = 8000
+STOPWORDS = {
+    "the", "and", "for", "of", "on", "in", "to", "a", "an", "is", "are", "with",
+    "by", "as", "at", "from", "this", "that", "its", "be", "or", "will",
+}
+
+# BM25 parameters (the usual defaults)
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+_count_tokens: Optional[Callable[[str], int]] = None
+
+
+def count_tokens(text: str) -> int:
+    """Token count with the configured tiktoken encoding (≈4 chars/token without it)."""
+    global _count_tokens
+    if _count_tokens is None:
+        try:
+            encoding = tiktoken.get_encoding(CONTEXT_TOKENIZER)
+            _count_tokens = lambda t: len(encoding.encode(t, disallowed_special=()))
+        except Exception as e:  # tiktoken missing, or encoding not downloadable
+            print(f"[context] Tokenizer unavailable, estimating tokens: {repr(e)}")
+            _count_tokens = lambda t: max(1, len(t) // 4)
+    return _count_tokens(text)
+
+
+def terms(text: str) -> List[str]:
+    """Lower-cased index terms, stopwords dropped and plurals folded."""
+    out = []
+    for word in re.findall(r"\w+", text.lower()):
+        if len(word) < 3 or word in STOPWORDS:
+            continue
+        if len(word) > 4 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        out.append(word)
+    return out
+
+
+def chunk_text(text: str, chunk_chars: int = CONTEXT_CHUNK_CHARS) -> List[str]:
+    """
+    Split text into chunks of roughly `chunk_chars`, on line boundaries where
+    possible (over-long lines are cut at sentence ends, then hard).
+    """
+    pieces: List[str] = []
+    for line in text.splitlines():
+        line = line.strip()
+        while len(line) > chunk_chars:
+            cut = line.rfind(". ", 0, chunk_chars)
+            cut = cut + 1 if cut > chunk_chars // 2 else chunk_chars
+            pieces.append(line[:cut].strip())
+            line = line[cut:].strip()
+        if line:
+            pieces.append(line)
+
+    chunks: List[str] = []
+    current: List[str] = []
+    size = 0
+    for piece in pieces:
+        if current and size + len(piece) > chunk_chars:
+            chunks.append("\n".join(current))
+            current, size = [], 0
+        current.append(piece)
+        size += len(piece) + 1
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
+
+
+class BM25Index:
+    """Okapi BM25 over a small list of chunks (built per document, in memory)."""
+
+    def __init__(self, chunks: List[str], tokenize: Callable[[str], List[str]] = terms) -> None:
+        self.tokenize = tokenize
+        self.docs = [Counter(tokenize(chunk)) for chunk in chunks]
+        self.lengths = [sum(doc.values()) for doc in self.docs]
+        self.avg_length = (sum(self.lengths) / len(self.lengths)) if self.lengths else 0.0
+
+        doc_freq: Dict[str, int] = Counter()
+        for doc in self.docs:
+            doc_freq.update(doc.keys())
+        n = len(self.docs)
+        self.idf = {
+            term: math.log(1 + (n - df + 0.5) / (df + 0.5))
+            for term, df in doc_freq.items()
+        }
+
+    def scores(self, query: str) -> List[float]:
+        query_terms = set(self.tokenize(query))
+        out = []
+        for doc, length in zip(self.docs, self.lengths):
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * length / (self.avg_length or 1))
+            score = 0.0
+            for term in query_terms:
+                tf = doc.get(term)
+                if tf:
+                    score += self.idf[term] * tf * (BM25_K1 + 1) / (tf + norm)
+            out.append(score)
+        return out
+
+
+def pack_context(text: str, query: str, token_budget: int = CONTEXT_TOKEN_BUDGET) -> str:
+    """
+    Text to put in a prompt: the chunks of `text` that best match `query`
+    (BM25), as many as fit in `token_budget`, in document order (the leading
+    chunks when nothing matches). Skipped
+    stretches are marked with "[...]". Documents that already fit are sent
+    whole; with CONTEXT_PACKING=truncate the first 8,000 characters are sent.
+    """
+    if not text:
+        return ""
+    if CONTEXT_PACKING == "truncate":
+        return text[:TRUNCATE_CHARS]
+    if count_tokens(text) <= token_budget:
+        return text
+
+    chunks = chunk_text(text)
+    scores = BM25Index(chunks).scores(query)
+
+    chosen: List[int] = []
+    used = 0
+    # Best first, ties to the earlier chunk; unmatched chunks only pad the
+    # prompt, so they are used only when nothing matched at all
+    for i in sorted(range(len(chunks)), key=lambda i: (-scores[i], i)):
+        if scores[i] <= 0 and chosen:
+            break
+        cost = count_tokens(chunks[i]) + 3  # + separator
+        if used + cost > token_budget:
+            continue
+        chosen.append(i)
+        used += cost
+
+    if not chosen:  # budget smaller than a single chunk
+        return text[: token_budget * 4]
+
+    parts = ["[...]"] if min(chosen) > 0 else []
+    previous = -1
+    for i in sorted(chosen):
+        if previous >= 0 and i != previous + 1:
+            parts.append("[...]")
+        parts.append(chunks[i])
+        previous = i
+    return "\n".join(parts)
@@ -0,0 +1,67 @@
+import hashlib
+import re
+from typing import List, Set, Tuple
+
+from .config import SCRAPE_DEDUPE_MAX_DISTANCE
+from .evidence import numbers_in
+
+
+SHINGLE_WORDS = 3
+HASH_BITS = 64
+
+
+def _shingles(text: str) -> List[str]:
+    words = re.findall(r"\w+", text.lower())
+    if len(words) <= SHINGLE_WORDS:
+        return [" ".join(words)]
+    return [" ".join(words[i:i + SHINGLE_WORDS]) for i in range(len(words) - SHINGLE_WORDS + 1)]
+
+
+def simhash(text: str) -> int:
+    """64-bit SimHash over word 3-shingles (similar texts differ in few bits)."""
+    hashes = [
+        int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "big")
+        for s in _shingles(text)
+    ]
+    half = len(hashes) / 2
+    fingerprint = 0
+    for bit in range(HASH_BITS):
+        if sum((h >> bit) & 1 for h in hashes) > half:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+def distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+def passages(text: str) -> List[str]:
+    """Paragraphs (blank-line separated), or lines when there are none."""
+    blocks = re.split(r"\n\s*\n", text) if re.search(r"\n\s*\n", text) else text.splitlines()
+    return [b.strip() for b in blocks if b.strip()]
+
+
+def merge_texts(
+    texts: List[str], max_distance: int = SCRAPE_DEDUPE_MAX_DISTANCE
+) -> Tuple[str, int]:
+    """
+    Concatenate documents passage by passage, in order, skipping passages
+    within `max_distance` bits of one already kept (mirrored copies, repeated
+    headers). A passage with numbers the kept one lacks is never a duplicate.
+    Returns (merged text, number of passages dropped).
+    """
+    kept: List[Tuple[int, Set[str]]] = []  # (fingerprint, numbers)
+    out: List[str] = []
+    dropped = 0
+    for text in texts:
+        for passage in passages(text):
+            fingerprint, numbers = simhash(passage), numbers_in(passage)
+            if any(
+                distance(fingerprint, k) <= max_distance and numbers <= kept_numbers
+                for k, kept_numbers in kept
+            ):
+                dropped += 1
+                continue
+            kept.append((fingerprint, numbers))
+            out.append(passage)
+    return "\n\n".join(out), dropped
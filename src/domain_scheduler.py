@@ -0,0 +1,153 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import Executor, Future
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from typing import Callable, Deque, Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+
+THROTTLE_STATUSES = (429, 503)
+MAX_RETRY_AFTER = 120.0
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            seconds = parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return None
+    return min(max(0.0, seconds), MAX_RETRY_AFTER)
+
+
+@dataclass
+class _HostState:
+    window: float
+    in_flight: int = 0
+    blocked_until: float = 0.0
+    timer_armed: bool = False
+    queue: Deque[Tuple[Future, Callable, tuple]] = field(default_factory=deque)
+
+
+class DomainScheduler:
+    """
+    Per-domain admission control for fetches.
+
+    Every host gets its own FIFO queue and a concurrency window that adapts
+    AIMD-style to what the host tells us:
+    - fast successful responses grow the window additively (+1/window),
+    - slow responses (above `target_latency`) shrink it gently,
+    - 429 / 503 halve it and pause the host for Retry-After seconds
+      (or `default_backoff` when the header is missing).
+
+    Jobs for a paused or saturated host wait in that host's queue without
+    occupying a worker, so other hosts keep the executor busy.
+    """
+
+    def __init__(
+        self,
+        executor: Executor,
+        initial_window: float = 2.0,
+        max_window: float = 4.0,
+        min_window: float = 1.0,
+        target_latency: float = 5.0,
+        default_backoff: float = 5.0,
+    ) -> None:
+        self._executor = executor
+        self.initial_window = initial_window
+        self.max_window = max_window
+        self.min_window = min_window
+        self.target_latency = target_latency
+        self.default_backoff = default_backoff
+
+        self._lock = threading.Lock()
+        self._hosts: Dict[str, _HostState] = {}
+
+    @staticmethod
+    def host_of(url: str) -> str:
+        return urlparse(url).netloc.lower()
+
+    def _state(self, host: str) -> _HostState:
+        st = self._hosts.get(host)
+        if st is None:
+            st = self._hosts[host] = _HostState(window=self.initial_window)
+        return st
+
+    def submit(self, url: str, fn: Callable, *args) -> Future:
+        """Queue `fn(*args)` behind other requests to the same host."""
+        fut: Future = Future()
+        host = self.host_of(url)
+        with self._lock:
+            self._state(host).queue.append((fut, fn, args))
+        self._pump(host)
+        return fut
+
+    def record(
+        self,
+        url: str,
+        status: int,
+        latency: float,
+        retry_after: Optional[float] = None,
+    ) -> None:
+        """
+        Feed back one response. `status` 0 means the request failed without
+        a response (timeout, connection error).
+        """
+        now = time.monotonic()
+        with self._lock:
+            st = self._state(self.host_of(url))
+            if status in THROTTLE_STATUSES:
+                st.window = max(self.min_window, st.window / 2)
+                pause = retry_after if retry_after is not None else self.default_backoff
+                st.blocked_until = max(st.blocked_until, now + pause)
+            elif status == 0 or latency > self.target_latency:
+                st.window = max(self.min_window, st.window * 0.75)
+            else:
+                st.window = min(self.max_window, st.window + 1.0 / st.window)
+
+    def window(self, url: str) -> float:
+        with self._lock:
+            return self._state(self.host_of(url)).window
+
+    def _pump(self, host: str) -> None:
+        with self._lock:
+            st = self._state(host)
+            wait = st.blocked_until - time.monotonic()
+            if wait > 0:
+                if not st.timer_armed:
+                    st.timer_armed = True
+                    timer = threading.Timer(wait, self._unblock, args=(host,))
+                    timer.daemon = True
+                    timer.start()
+                return
+
+            while st.queue and st.in_flight < max(1, int(st.window)):
+                fut, fn, args = st.queue.popleft()
+                if not fut.set_running_or_notify_cancel():
+                    continue  # cancelled while queued
+                st.in_flight += 1
+                self._executor.submit(self._run, host, fut, fn, args)
+
+    def _unblock(self, host: str) -> None:
+        with self._lock:
+            self._state(host).timer_armed = False
+        self._pump(host)
+
+    def _run(self, host: str, fut: Future, fn: Callable, args: tuple) -> None:
+        try:
+            result = fn(*args)
+        except BaseException as e:
+            fut.set_exception(e)
+        else:
+            fut.set_result(result)
+        finally:
+            with self._lock:
+                self._state(host).in_flight -= 1
+            self._pump(host)
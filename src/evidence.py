@@ -0,0 +1,149 @@
+import re
+from dataclasses import dataclass, field
+from typing import List, Set, Tuple
+
+from .context import BM25Index, terms
+
+
+SENTENCE_END = re.compile(r"(?<=[.!?;])\s+")
+NUMBER = re.compile(r"\d+(?:[.,]\d+)*")
+NEGATIONS = {"no", "not", "never", "none", "nor", "neither", "without", "cannot"}
+# Stems of words stating a direction of change ("increase" vs "reduce")
+DIRECTIONS = {
+    "up": ("increas", "rais", "grow", "expand", "boost", "doubl", "higher"),
+    "down": ("reduc", "decreas", "cut", "lower", "declin", "halv", "fewer"),
+}
+CANDIDATES = 10         # spans re-scored in detail per summary sentence
+MAX_QUOTE_CHARS = 400
+
+
+@dataclass
+class Evidence:
+    quote: str = ""             # best matching passage ("" when nothing matched)
+    score: float = 0.0          # 0..1, how much of the sentence the passage covers
+    numbers_ok: bool = True     # every number in the sentence appears in the quote
+    polarity_ok: bool = True    # same negation / direction of change (see polarity_ok)
+    snippets: List[str] = field(default_factory=list)  # best passages, best first
+
+    def supports(self, threshold: float) -> bool:
+        """Strong enough to count as Verified without an LLM."""
+        return bool(self.quote) and self.score >= threshold and self.numbers_ok and self.polarity_ok
+
+
+def _spans(text: str) -> List[str]:
+    """Sentence-sized spans of the source text."""
+    spans = []
+    for line in text.splitlines():
+        for part in SENTENCE_END.split(line.strip()):
+            if len(part) > 2:
+                spans.append(part)
+    return spans
+
+
+def _ngrams(words: List[str], n: int = 3) -> Set[tuple]:
+    if len(words) < n:
+        return {tuple(words)} if words else set()
+    return {tuple(words[i:i + n]) for i in range(len(words) - n + 1)}
+
+
+def numbers_in(text: str) -> Set[str]:
+    return {n.replace(",", "") for n in NUMBER.findall(text)}
+
+
+def _words(text: str) -> List[str]:
+    return re.findall(r"\w+", re.sub(r"n['’]t\b", " not", text.lower()))
+
+
+def _match_terms(text: str) -> List[str]:
+    """context.terms, plus the short numbers and negations it drops."""
+    out = []
+    for word in _words(text):
+        if word.isdigit() or word in NEGATIONS:
+            out.append(word)
+        else:
+            out.extend(terms(word))
+    return out
+
+
+def _polarity(text: str) -> Tuple[bool, Set[str]]:
+    words = _words(text)
+    negated = any(w in NEGATIONS for w in words)
+    directions = {
+        d for d, stems in DIRECTIONS.items() for w in words if w.startswith(stems)
+    }
+    return negated, directions
+
+
+def polarity_ok(sentence: str, passage: str) -> bool:
+    """Both or neither negated, and the sentence's directions of change are in the passage."""
+    negated, directions = _polarity(sentence)
+    passage_negated, passage_directions = _polarity(passage)
+    return negated == passage_negated and directions <= passage_directions
+
+
+class EvidenceIndex:
+    """
+    Local evidence matcher over a document's raw text.
+
+    Spans are retrieved with BM25, then each candidate (alone and joined with
+    its neighbour, since summaries often merge two source sentences) is scored on
+    word-trigram containment and content-word coverage of the summary sentence.
+    Short numbers and negations are indexed too. Numbers in the sentence must
+    appear verbatim in the passage, and a passage that differs in negation or
+    direction of change ("increase" vs "reduce") never supports it.
+    """
+
+    def __init__(self, text: str) -> None:
+        self.spans = _spans(text or "")
+        self._bm25 = BM25Index(self.spans, _match_terms) if self.spans else None
+        self._terms = [_match_terms(span) for span in self.spans]
+
+    def _windows(self, i: int) -> List[range]:
+        windows = [range(i, i + 1)]
+        if i + 1 < len(self.spans):
+            windows.append(range(i, i + 2))
+        return windows
+
+    def match(self, sentence: str, top_k: int = 3) -> Evidence:
+        if self._bm25 is None:
+            return Evidence(numbers_ok=not numbers_in(sentence))
+
+        bm25 = self._bm25.scores(sentence)
+        candidates = [
+            i for i in sorted(range(len(self.spans)), key=lambda i: -bm25[i])[:CANDIDATES]
+            if bm25[i] > 0
+        ]
+        if not candidates:
+            return Evidence(numbers_ok=not numbers_in(sentence))
+
+        words = _match_terms(sentence)
+        grams = _ngrams(words)
+        vocab = set(words)
+        numbers = numbers_in(sentence)
+
+        scored = []
+        for i in candidates:
+            for window in self._windows(i):
+                window_words = [w for j in window for w in self._terms[j]]
+                containment = len(grams & _ngrams(window_words)) / len(grams) if grams else 0.0
+                coverage = len(vocab & set(window_words)) / len(vocab) if vocab else 0.0
+                text = " ".join(self.spans[j] for j in window)
+                scored.append((0.6 * containment + 0.4 * coverage, i, len(window), text))
+        # Best first; on ties the shorter, then the earlier passage
+        scored.sort(key=lambda s: (-s[0], s[2], s[1]))
+
+        best_score, _, _, best_text = scored[0]
+        snippets: List[str] = []
+        for _, _, _, text in scored:
+            if len(snippets) >= top_k:
+                break
+            text = text[:MAX_QUOTE_CHARS]
+            if text not in snippets:
+                snippets.append(text)
+        return Evidence(
+            quote=best_text[:MAX_QUOTE_CHARS],
+            score=best_score,
+            numbers_ok=numbers <= numbers_in(best_text),
+            polarity_ok=polarity_ok(sentence, best_text),
+            snippets=snippets,
+        )
@@ -1,6 +1,7 @@
 from typing import List
 import pandas as pd
 
+from . import metrics
 from .models import StrategyRecord
 
 
@@ -36,6 +37,7 @@ def _short_one_sentence(text: str, max_words: int = MAX_WORDS) -> str:
     return candidate.strip()
 
 
+@metrics.timed_stage("export")
 def export_to_excel(records: List[StrategyRecord], path: str = "deep_search_results.xlsx") -> None:
     rows = []
 
@@ -49,6 +51,8 @@ def export_to_excel(records: List[StrategyRecord], path: str = "deep_search_resu
         ]
         joined = " ".join(all_sentences).strip()
         description = _short_one_sentence(joined)
+        if rec.fetch_failed:
+            description = f"Source document could not be retrieved ({rec.fetch.status})."
 
         # --- Overall verification status per strategy (strict 3-class) ---
         if not rec.summary_sentences:
@@ -73,6 +77,7 @@ def export_to_excel(records: List[StrategyRecord], path: str = "deep_search_resu
                 "Strategy name": rec.strategy_name,
                 "Description / summary": description,
                 "Link": rec.primary_link or "",
+                "Sources": "\n".join(rec.fetch.urls) if rec.fetch else "",
                 "Verification status": overall_status,
             }
         )
@@ -0,0 +1,176 @@
+import re
+from typing import Callable, Dict, List
+
+import lxml.html
+from bs4 import BeautifulSoup
+
+from .config import HTML_EXTRACTOR
+
+
+HtmlExtractor = Callable[[str], str]
+
+NOISE_TAGS = ["script", "style", "noscript"]
+
+# Elements that are navigation / chrome rather than document content
+BOILERPLATE_TAGS = ["nav", "header", "footer", "aside", "form", "menu", "template", "iframe"]
+# Exact class / id tokens of such elements ("sidebar", not "has-sidebar")
+BOILERPLATE_HINTS = {
+    "nav", "navbar", "navigation", "menu", "footer", "header", "breadcrumb", "breadcrumbs",
+    "sidebar", "cookie", "cookies", "banner", "skip", "social", "share", "related",
+    "subscribe", "newsletter", "popup", "modal",
+}
+# A hinted element is only dropped while it holds less than this share of the
+# page text (or is mostly links)
+MAX_HINT_SHARE = 0.3
+MAIN_CONTENT_XPATHS = [
+    "//main",
+    "//*[@role='main']",
+    "//article",
+    "//*[@id='content' or @id='main-content' or @id='main']",
+]
+LINK_DENSITY_TAGS = ["div", "ul", "ol", "table", "section"]
+MAX_LINK_DENSITY = 0.5
+
+_HTML_EXTRACTORS: Dict[str, HtmlExtractor] = {}
+
+# Text was already decoded by the fetcher; don't let <meta charset> override it
+_UTF8_PARSER = lxml.html.HTMLParser(encoding="utf-8")
+
+
+def register_html_extractor(name: str) -> Callable[[HtmlExtractor], HtmlExtractor]:
+    """Decorator that makes an HTML → text function selectable by name."""
+    def decorator(fn: HtmlExtractor) -> HtmlExtractor:
+        _HTML_EXTRACTORS[name] = fn
+        return fn
+    return decorator
+
+
+def available_html_extractors() -> List[str]:
+    return sorted(_HTML_EXTRACTORS)
+
+
+def get_html_extractor(name: str = HTML_EXTRACTOR) -> HtmlExtractor:
+    try:
+        return _HTML_EXTRACTORS[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown HTML extractor '{name}', "
+            f"choose one of: {', '.join(available_html_extractors())}"
+        )
+
+
+@register_html_extractor("bs4")
+def extract_bs4(html: str) -> str:
+    """Visible text via BeautifulSoup + html.parser (pure Python, slowest)."""
+    soup = BeautifulSoup(html, "html.parser")
+
+    # Remove common noise
+    for tag in soup(NOISE_TAGS):
+        tag.decompose()
+
+    body = soup.body or soup
+    return body.get_text(separator="\n", strip=True)
+
+
+def _lxml_root(html: str):
+    if not html.strip():
+        return None
+    # Parse bytes: lxml refuses str input carrying an XML encoding declaration
+    doc = lxml.html.document_fromstring(
+        html.encode("utf-8", errors="replace"), parser=_UTF8_PARSER
+    )
+    for el in list(doc.iter(*NOISE_TAGS)):
+        el.drop_tree()
+    return doc
+
+
+def _main_block(root):
+    """The element holding the most paragraph text directly."""
+    best, best_len = root, 0
+    for el in root.iter():
+        if not isinstance(el.tag, str):
+            continue
+        length = len((el.text or "").strip()) + sum(
+            len(child.text_content().strip()) for child in el if child.tag == "p"
+        )
+        if length > best_len:
+            best, best_len = el, length
+    return best
+
+
+def _link_density(el) -> float:
+    text_len = len(el.text_content().strip())
+    if not text_len:
+        return 0.0
+    return sum(len(a.text_content().strip()) for a in el.iter("a")) / text_len
+
+
+def _lxml_text(root) -> str:
+    lines = (t.strip() for t in root.itertext())
+    return "\n".join(t for t in lines if t)
+
+
+@register_html_extractor("lxml")
+def extract_lxml(html: str) -> str:
+    """Visible text via lxml (C parser); same output shape as `bs4`."""
+    doc = _lxml_root(html)
+    if doc is None:
+        return ""
+    body = doc.find("body")
+    return _lxml_text(body if body is not None else doc)
+
+
+@register_html_extractor("lxml-main")
+def extract_lxml_main(html: str) -> str:
+    """
+    Main-content text via lxml: keeps the <main>/<article> region when there is
+    one and strips navigation, headers, footers, cookie banners and link lists.
+    Elements wrapping the main text block are never stripped, and elements
+    that are boilerplate by class / id only while they hold little of the text.
+    """
+    doc = _lxml_root(html)
+    if doc is None:
+        return ""
+
+    root = None
+    for xpath in MAIN_CONTENT_XPATHS:
+        found = doc.xpath(xpath)
+        if found and len(_lxml_text(found[0])) > 200:
+            root = found[0]
+            break
+    if root is None:
+        root = doc.find("body")
+        if root is None:
+            root = doc
+
+    block = _main_block(root)
+    protected = {block, *block.iterancestors()}
+
+    for el in list(root.iter(*BOILERPLATE_TAGS)):
+        if el is not root and el not in protected and el.getparent() is not None:
+            el.drop_tree()
+
+    total = len(root.text_content().strip()) or 1
+    for el in list(root.iter()):
+        if el is root or el in protected or el.getparent() is None or not isinstance(el.tag, str):
+            continue
+        hint = {*el.get("class", "").lower().split(), el.get("id", "").lower()}
+        if hint & BOILERPLATE_HINTS and (
+            len(el.text_content().strip()) / total < MAX_HINT_SHARE
+            or _link_density(el) > MAX_LINK_DENSITY
+        ):
+            el.drop_tree()
+
+    # Drop blocks that are mostly links (menus, "related pages" lists, ...)
+    for el in list(root.iter(*LINK_DENSITY_TAGS)):
+        if el is root or el in protected or el.getparent() is None:
+            continue
+        if _link_density(el) > MAX_LINK_DENSITY:
+            el.drop_tree()
+
+    return _lxml_text(root)
+
+
+def extract_html(html: str, name: str = HTML_EXTRACTOR) -> str:
+    """Extract text from an HTML page with the configured backend."""
+    return get_html_extractor(name)(html)
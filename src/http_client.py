@@ -0,0 +1,120 @@
+import threading
+from typing import Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .config import (
+    HTTP_CONNECT_TIMEOUT,
+    HTTP_READ_TIMEOUT,
+    HTTP_POOL_HOSTS,
+    HTTP_MAX_PER_HOST,
+    HTTP_MAX_RETRIES,
+    HTTP_BACKOFF_FACTOR,
+    HTTP_BACKOFF_JITTER,
+)
+
+try:
+    # urllib3 only decodes brotli ("br") bodies when one of these is installed,
+    # so only advertise it when it can actually be decoded.
+    import brotli  # noqa: F401
+    _ACCEPT_ENCODING = "gzip, deflate, br"
+except ImportError:
+    try:
+        import brotlicffi  # noqa: F401
+        _ACCEPT_ENCODING = "gzip, deflate, br"
+    except ImportError:
+        _ACCEPT_ENCODING = "gzip, deflate"
+
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+THROTTLE_STATUSES = (429, 503)
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (compatible; DeepSearchAgent/1.0)",
+    "Accept-Encoding": _ACCEPT_ENCODING,
+}
+
+_sessions: Dict[bool, requests.Session] = {}
+_session_lock = threading.Lock()
+
+
+def _build_session(retry_throttled: bool = True) -> requests.Session:
+    """
+    Session with a pooled, keep-alive adapter:
+    - up to HTTP_POOL_HOSTS hosts kept in the pool,
+    - at most HTTP_MAX_PER_HOST open connections per host (extra callers wait),
+    - GET/HEAD retried on connection errors and 429/5xx with exponential
+      backoff plus jitter (Retry-After is honored).
+    With `retry_throttled=False`, 429/503 are returned to the caller instead
+    (for callers that schedule their own backoff per host).
+    """
+    statuses = RETRY_STATUSES if retry_throttled else tuple(
+        s for s in RETRY_STATUSES if s not in THROTTLE_STATUSES
+    )
+    retry = Retry(
+        total=HTTP_MAX_RETRIES,
+        connect=HTTP_MAX_RETRIES,
+        read=HTTP_MAX_RETRIES,
+        status=HTTP_MAX_RETRIES,
+        status_forcelist=statuses,
+        allowed_methods=frozenset({"GET", "HEAD"}),
+        backoff_factor=HTTP_BACKOFF_FACTOR,
+        backoff_jitter=HTTP_BACKOFF_JITTER,
+        # urllib3 retries any 413/429/503 carrying Retry-After when this is on,
+        # status_forcelist or not: it has to be off to hand those back
+        respect_retry_after_header=retry_throttled,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=HTTP_POOL_HOSTS,
+        pool_maxsize=HTTP_MAX_PER_HOST,
+        pool_block=True,
+        max_retries=retry,
+    )
+
+    session = requests.Session()
+    session.headers.update(DEFAULT_HEADERS)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_session(retry_throttled: bool = True) -> requests.Session:
+    """Return the process-wide shared session (created on first use)."""
+    with _session_lock:
+        session = _sessions.get(retry_throttled)
+        if session is None:
+            session = _sessions[retry_throttled] = _build_session(retry_throttled)
+        return session
+
+
+def get(
+    url: str,
+    connect_timeout: Optional[float] = None,
+    read_timeout: Optional[float] = None,
+    retry_throttled: bool = True,
+    **kwargs,
+) -> requests.Response:
+    """GET through the shared session with separate connect / read timeouts."""
+    timeout = (
+        connect_timeout if connect_timeout is not None else HTTP_CONNECT_TIMEOUT,
+        read_timeout if read_timeout is not None else HTTP_READ_TIMEOUT,
+    )
+    return get_session(retry_throttled).get(url, timeout=timeout, **kwargs)
+
+
+def head(
+    url: str,
+    connect_timeout: Optional[float] = None,
+    read_timeout: Optional[float] = None,
+    retry_throttled: bool = True,
+    **kwargs,
+) -> requests.Response:
+    """HEAD through the shared session with separate connect / read timeouts."""
+    timeout = (
+        connect_timeout if connect_timeout is not None else HTTP_CONNECT_TIMEOUT,
+        read_timeout if read_timeout is not None else HTTP_READ_TIMEOUT,
+    )
+    return get_session(retry_throttled).head(url, timeout=timeout, **kwargs)
@@ -0,0 +1,140 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+import requests
+
+from . import http_client, metrics
+from .cache import SQLiteCache
+from .config import (
+    LINK_PROBE_CONCURRENCY,
+    LINK_PROBE_TIMEOUT,
+    LINK_PROBE_CACHE_TTL,
+    SEARCH_CACHE_MAX_ENTRIES,
+    SEARCH_CACHE_BYPASS,
+)
+
+
+RANGE_BYTES = 1024
+# Hosts / path fragments of sign-in pages that links get redirected to
+LOGIN_MARKERS = (
+    "/login", "/signin", "/sign-in", "/sso/", "/auth/", "//login.", "//sso.", "//accounts.",
+)
+# Status codes that say nothing about the link itself (try again later)
+TRANSIENT_STATUSES = (0, 408, 425, 429, 500, 502, 503, 504)
+
+
+@dataclass
+class Probe:
+    url: str
+    status: int = 0              # final HTTP status (0 = no response)
+    content_type: str = ""
+    size: Optional[int] = None   # Content-Length / Content-Range total, if sent
+    final_url: str = ""          # after redirects
+    is_pdf: bool = False
+    seconds: float = 0.0
+
+    @property
+    def alive(self) -> bool:
+        return 0 < self.status < 400
+
+    @property
+    def login_wall(self) -> bool:
+        redirected = self.final_url and self.final_url != self.url
+        return self.status in (401, 407) or bool(redirected) and any(
+            marker in self.final_url.lower() for marker in LOGIN_MARKERS
+        )
+
+    def describe(self) -> str:
+        size = f", {self.size} bytes" if self.size is not None else ""
+        kind = "pdf" if self.is_pdf else (self.content_type or "unknown type")
+        return f"HTTP {self.status or 'error'}, {kind}{size}"
+
+
+probe_cache = SQLiteCache(
+    namespace="probe",
+    ttl=LINK_PROBE_CACHE_TTL,
+    max_entries=SEARCH_CACHE_MAX_ENTRIES,
+    bypass=SEARCH_CACHE_BYPASS,
+)
+
+_pool: Optional[ThreadPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ThreadPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(
+                max_workers=max(1, LINK_PROBE_CONCURRENCY), thread_name_prefix="link-probe"
+            )
+        return _pool
+
+
+def _size(resp: requests.Response) -> Optional[int]:
+    content_range = resp.headers.get("Content-Range", "")
+    if "/" in content_range and content_range.rsplit("/", 1)[1].isdigit():
+        return int(content_range.rsplit("/", 1)[1])
+    length = resp.headers.get("Content-Length", "")
+    return int(length) if length.isdigit() else None
+
+
+def _request(url: str) -> Probe:
+    """HEAD, or a Range GET of the first RANGE_BYTES when HEAD is refused."""
+    timeouts = {"connect_timeout": LINK_PROBE_TIMEOUT, "read_timeout": LINK_PROBE_TIMEOUT}
+    resp = http_client.head(url, allow_redirects=True, retry_throttled=False, **timeouts)
+    head = b""
+    if resp.status_code >= 400 or not resp.headers.get("Content-Type"):
+        with http_client.get(
+            url,
+            stream=True,
+            headers={"Range": f"bytes=0-{RANGE_BYTES - 1}"},
+            retry_throttled=False,
+            **timeouts,
+        ) as resp:
+            if resp.status_code < 400:
+                head = next(resp.iter_content(RANGE_BYTES), b"")
+
+    content_type = resp.headers.get("Content-Type", "").split(";", 1)[0].strip().lower()
+    final_url = resp.url or url
+    generic = content_type in ("", "application/octet-stream", "binary/octet-stream")
+    return Probe(
+        url=url,
+        status=resp.status_code,
+        content_type=content_type,
+        size=_size(resp),
+        final_url=final_url,
+        is_pdf="pdf" in content_type or head.startswith(b"%PDF") or (
+            generic and urlparse(final_url).path.lower().endswith(".pdf")
+        ),
+    )
+
+
+def probe_url(url: str) -> Probe:
+    """Probe one URL (cached; transient failures are not cached)."""
+    cached = probe_cache.get(url)
+    if cached is not None:
+        return Probe(**cached)
+
+    started = time.perf_counter()
+    try:
+        probe = _request(url)
+    except Exception as e:
+        print(f"[link_probe] {url}: {repr(e)}")
+        probe = Probe(url=url, final_url=url)
+    probe.seconds = time.perf_counter() - started
+    metrics.observe_http("probe", probe.status, 0, probe.seconds)
+
+    if probe.status not in TRANSIENT_STATUSES:
+        probe_cache.set(url, asdict(probe))
+    return probe
+
+
+def probe_all(urls: List[str]) -> Dict[str, Probe]:
+    """Probe all URLs in parallel (shared LINK_PROBE_CONCURRENCY pool)."""
+    unique = list(dict.fromkeys(urls))
+    return dict(zip(unique, _get_pool().map(probe_url, unique)))
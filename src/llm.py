@@ -0,0 +1,597 @@
+import asyncio
+import dataclasses
+import hashlib
+import json
+import queue
+import random
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, List, Optional
+
+import openai
+from openai import AsyncOpenAI
+
+from .config import (
+    OPENAI_API_KEY,
+    LLM_MODEL,
+    LLM_MODEL_TIERS,
+    LLM_ROUTE_LONG_INPUT_TOKENS,
+    LLM_CONCURRENCY,
+    LLM_RPM,
+    LLM_TPM,
+    LLM_MAX_RETRIES,
+    LLM_MODE,
+    LLM_CACHE_ENABLED,
+    LLM_CACHE_TTL,
+    LLM_CACHE_MAX_ENTRIES,
+    LLM_CACHE_BYPASS,
+)
+from .cache import SQLiteCache
+from . import metrics
+
+
+# Errors worth retrying with backoff; anything else fails the request at once.
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APIConnectionError,
+    openai.APITimeoutError,
+    openai.InternalServerError,
+)
+MAX_BACKOFF = 60.0
+
+# USD per 1M (input, output) tokens, for the usage report; Batch API calls cost half
+MODEL_PRICES = {
+    "gpt-4.1": (2.00, 8.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1-nano": (0.10, 0.40),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+}
+BATCH_DISCOUNT = 0.5
+
+
+@dataclass
+class LLMRequest:
+    stage: str                  # "summarize", "verify", ... (for logging / stats)
+    instructions: str
+    prompt: str
+    model: str = LLM_MODEL
+    max_output_tokens: int = 1024   # cap sent with the call (and reserved against TPM)
+
+
+@dataclass
+class LLMResult:
+    text: str = ""
+    error: Optional[Exception] = None
+    model: str = ""
+    input_tokens: int = 0
+    output_tokens: int = 0
+    latency: float = 0.0
+    attempts: int = 0
+    cached: bool = False
+
+
+@dataclass
+class LLMEvent:
+    """Progress of one request in a streamed run (see iter_results)."""
+    index: int                          # position of the request in the input list
+    delta: str = ""                     # newly streamed output text
+    result: Optional[LLMResult] = None  # set once the request is finished
+    restart: bool = False               # earlier deltas are void (request escalated)
+
+
+# Persistent response cache shared by every LLM stage, keyed by a hash of
+# model + instructions + prompt.
+response_cache: Optional[SQLiteCache] = (
+    SQLiteCache(
+        namespace="llm",
+        ttl=LLM_CACHE_TTL,
+        max_entries=LLM_CACHE_MAX_ENTRIES,
+        bypass=LLM_CACHE_BYPASS,
+    )
+    if LLM_CACHE_ENABLED
+    else None
+)
+
+# stage -> {"hits", "misses", "coalesced"}
+_cache_stats: Dict[str, Dict[str, int]] = {}
+_cache_stats_lock = threading.Lock()
+
+
+def cache_key(request: LLMRequest) -> str:
+    payload = json.dumps(
+        [request.model, request.instructions, request.prompt, request.max_output_tokens],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _count(stage: str, outcome: str) -> None:
+    with _cache_stats_lock:
+        stats = _cache_stats.setdefault(stage, {"hits": 0, "misses": 0, "coalesced": 0})
+        stats[outcome] += 1
+
+
+def cache_stats() -> Dict[str, Dict[str, int]]:
+    """Per-stage response cache counters (hits, misses, coalesced in-flight)."""
+    with _cache_stats_lock:
+        return {stage: dict(stats) for stage, stats in _cache_stats.items()}
+
+
+def format_cache_stats() -> List[str]:
+    """One human-readable line per stage, e.g. for the end of a CLI run."""
+    lines = []
+    for stage, stats in sorted(cache_stats().items()):
+        total = stats["hits"] + stats["misses"] + stats["coalesced"]
+        rate = (stats["hits"] + stats["coalesced"]) / total if total else 0.0
+        lines.append(
+            f"{stage}: {stats['hits']} hits, {stats['coalesced']} coalesced, "
+            f"{stats['misses']} API calls ({rate:.0%} saved)"
+        )
+    return lines
+
+
+# model -> {"calls", "cached", "errors", "escalated", "latency", "input_tokens",
+#           "output_tokens", "cost"}
+_usage_stats: Dict[str, Dict[str, float]] = {}
+
+
+def _record_usage(request: LLMRequest, result: LLMResult) -> None:
+    input_price, output_price = MODEL_PRICES.get(request.model, (0.0, 0.0))
+    cost = (result.input_tokens * input_price + result.output_tokens * output_price) / 1e6
+    if LLM_MODE == "batch":
+        cost *= BATCH_DISCOUNT
+    with _cache_stats_lock:
+        stats = _usage_stats.setdefault(request.model, dict.fromkeys(
+            ("calls", "cached", "errors", "escalated", "latency",
+             "input_tokens", "output_tokens", "cost"), 0))
+        stats["calls"] += 1
+        stats["cached"] += result.cached
+        stats["errors"] += result.error is not None
+        stats["latency"] += result.latency
+        stats["input_tokens"] += result.input_tokens
+        stats["output_tokens"] += result.output_tokens
+        stats["cost"] += cost
+    metrics.observe_llm(
+        request.stage, request.model, result.input_tokens, result.output_tokens,
+        cost, result.latency, cached=result.cached, error=result.error is not None,
+    )
+
+
+def _record_escalation(model: str) -> None:
+    with _cache_stats_lock:
+        _usage_stats[model]["escalated"] += 1
+
+
+@metrics.on_reset
+def _reset_stats() -> None:
+    with _cache_stats_lock:
+        _cache_stats.clear()
+        _usage_stats.clear()
+
+
+def usage_stats() -> Dict[str, Dict[str, float]]:
+    """Per-model counters: calls, cache hits, errors, escalations, latency, tokens, cost."""
+    with _cache_stats_lock:
+        return {model: dict(stats) for model, stats in _usage_stats.items()}
+
+
+def format_usage_stats() -> List[str]:
+    lines = []
+    for model, stats in usage_stats().items():
+        fresh = stats["calls"] - stats["cached"]
+        avg_latency = stats["latency"] / fresh if fresh else 0.0
+        lines.append(
+            f"{model}: {stats['calls']} calls ({stats['cached']} cached, "
+            f"{stats['escalated']} escalated), avg {avg_latency:.1f}s, "
+            f"{stats['input_tokens']}+{stats['output_tokens']} tokens, ${stats['cost']:.4f}"
+        )
+    return lines
+
+
+def _cached_result(request: LLMRequest) -> Optional[LLMResult]:
+    if response_cache is None:
+        return None
+    value = response_cache.get(cache_key(request))
+    if value is None:
+        return None
+    return LLMResult(text=value["text"], model=value.get("model", request.model), cached=True)
+
+
+def _store_result(request: LLMRequest, result: LLMResult) -> None:
+    if response_cache is None or result.error is not None or not result.text.strip():
+        return
+    response_cache.set(cache_key(request), {"text": result.text, "model": result.model})
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (≈4 characters per token) for rate limiting."""
+    return max(1, len(text) // 4)
+
+
+class TokenBucket:
+    """
+    Allows `per_minute` units per minute, refilled continuously, with at most
+    one minute's worth banked. Only used from the executor's event loop.
+    """
+
+    def __init__(self, per_minute: float) -> None:
+        self.capacity = float(per_minute)
+        self.tokens = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount: float) -> None:
+        # Requests bigger than the whole bucket may still go once it is full
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+
+    def refund(self, amount: float) -> None:
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + max(0.0, amount))
+
+
+class LLMExecutor:
+    """
+    Shared, bounded-concurrency executor for OpenAI Responses API calls.
+
+    Runs an AsyncOpenAI client on a private event loop thread, so it can be
+    used from any synchronous code (CLI, Streamlit, worker threads):
+    - at most `concurrency` calls in flight,
+    - token buckets for requests per minute and tokens per minute,
+    - 429 / connection / 5xx errors retried with exponential backoff + jitter
+      (Retry-After is honored when the API sends it),
+    - answers served from the persistent response cache when possible, and
+      identical requests already in flight share one API call.
+
+    Point OPENAI_BASE_URL at `python -m tools.fake_openai_server` to run offline.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = LLM_CONCURRENCY,
+        rpm: float = LLM_RPM,
+        tpm: float = LLM_TPM,
+        max_retries: int = LLM_MAX_RETRIES,
+    ) -> None:
+        self.concurrency = max(1, concurrency)
+        self.rpm = rpm
+        self.tpm = tpm
+        self.max_retries = max_retries
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._start_lock = threading.Lock()
+        self._inflight: Dict[str, asyncio.Future] = {}  # only touched on the loop
+
+    # -- event loop plumbing -------------------------------------------------
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._start_lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                ready = threading.Event()
+
+                def run() -> None:
+                    asyncio.set_event_loop(loop)
+                    # Created on the loop so they bind to it
+                    self._semaphore = asyncio.Semaphore(self.concurrency)
+                    self._rpm = TokenBucket(self.rpm)
+                    self._tpm = TokenBucket(self.tpm)
+                    try:
+                        self._client = AsyncOpenAI(api_key=OPENAI_API_KEY, max_retries=0)
+                    except Exception as e:  # e.g. no API key configured
+                        self._client = None
+                        self._client_error = e
+                    ready.set()
+                    loop.run_forever()
+
+                threading.Thread(target=run, name="llm-executor", daemon=True).start()
+                ready.wait()
+                self._loop = loop
+            return self._loop
+
+    def submit(
+        self, request: LLMRequest, on_delta: Optional[Callable[[str], None]] = None
+    ) -> "Future[LLMResult]":
+        """
+        Schedule one request; returns a concurrent.futures.Future. With
+        `on_delta`, the answer is streamed and each text delta is passed to it
+        (on the executor's loop thread; keep it cheap, e.g. queue.put).
+        """
+        return asyncio.run_coroutine_threadsafe(
+            self._execute(request, on_delta), self._ensure_loop()
+        )
+
+    def run_all(self, requests: List[LLMRequest]) -> List[LLMResult]:
+        """Run all requests concurrently and return results in input order."""
+        futures = [self.submit(req) for req in requests]
+        return [fut.result() for fut in futures]
+
+    def complete(self, request: LLMRequest) -> LLMResult:
+        return self.submit(request).result()
+
+    # -- request execution ---------------------------------------------------
+
+    async def _call(self, request: LLMRequest, on_delta: Optional[Callable[[str], None]] = None):
+        if on_delta is None:
+            return await self._client.responses.create(
+                model=request.model,
+                instructions=request.instructions,
+                input=request.prompt,
+                max_output_tokens=request.max_output_tokens,
+            )
+
+        stream = await self._client.responses.create(
+            model=request.model,
+            instructions=request.instructions,
+            input=request.prompt,
+            max_output_tokens=request.max_output_tokens,
+            stream=True,
+        )
+        async for event in stream:
+            if event.type == "response.output_text.delta":
+                on_delta(event.delta)
+            elif event.type == "response.completed":
+                return event.response
+            elif event.type in ("response.failed", "response.incomplete", "error"):
+                raise RuntimeError(f"Streamed response ended with {event.type}")
+        raise RuntimeError("Stream closed before the response completed")
+
+    async def _execute(
+        self, request: LLMRequest, on_delta: Optional[Callable[[str], None]] = None
+    ) -> LLMResult:
+        cached = await asyncio.to_thread(_cached_result, request)
+        if cached is not None:
+            _count(request.stage, "hits")
+            return cached
+
+        key = cache_key(request)
+        shared = self._inflight.get(key)
+        if shared is not None:
+            _count(request.stage, "coalesced")
+            return dataclasses.replace(await asyncio.shield(shared))
+
+        _count(request.stage, "misses")
+        shared = self._inflight[key] = asyncio.get_running_loop().create_future()
+        try:
+            result = await self._call_with_retries(request, on_delta)
+        except BaseException as e:
+            shared.set_exception(e)
+            raise
+        finally:
+            self._inflight.pop(key, None)
+        shared.set_result(result)
+
+        await asyncio.to_thread(_store_result, request, result)
+        return result
+
+    async def _call_with_retries(
+        self, request: LLMRequest, on_delta: Optional[Callable[[str], None]] = None
+    ) -> LLMResult:
+        estimated = estimate_tokens(request.instructions + request.prompt) + request.max_output_tokens
+        result = LLMResult(model=request.model)
+        if self._client is None:
+            result.error = self._client_error
+            return result
+
+        async with self._semaphore:
+            for attempt in range(self.max_retries + 1):
+                result.attempts = attempt + 1
+                await self._rpm.acquire(1)
+                await self._tpm.acquire(estimated)
+
+                started = time.perf_counter()
+                try:
+                    response = await self._call(request, on_delta)
+                except RETRYABLE_ERRORS as e:
+                    result.error = e
+                    if attempt >= self.max_retries:
+                        break
+                    delay = _retry_after(e)
+                    if delay is None:
+                        delay = min(MAX_BACKOFF, 2 ** attempt) + random.uniform(0, 1)
+                    metrics.count(request.stage, "retries")
+                    print(
+                        f"[llm:{request.stage}] {type(e).__name__}, retrying in {delay:.1f}s "
+                        f"(attempt {attempt + 1}/{self.max_retries})"
+                    )
+                    await asyncio.sleep(delay)
+                    continue
+                except Exception as e:
+                    result.error = e
+                    break
+
+                result.error = None
+                result.latency = time.perf_counter() - started
+                result.text = response.output_text or ""
+                usage = getattr(response, "usage", None)
+                if usage is not None:
+                    result.input_tokens = usage.input_tokens or 0
+                    result.output_tokens = usage.output_tokens or 0
+                    self._tpm.refund(estimated - result.input_tokens - result.output_tokens)
+                break
+
+        return result
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    value = response.headers.get("retry-after")
+    try:
+        return min(MAX_BACKOFF, float(value)) if value else None
+    except ValueError:
+        return None
+
+
+_executor: Optional[LLMExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> LLMExecutor:
+    """Process-wide executor shared by all LLM stages."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = LLMExecutor()
+        return _executor
+
+
+def run_all(requests: List[LLMRequest]) -> List[LLMResult]:
+    """
+    Run a stage's requests and return results in input order: through the
+    shared executor, or the Batch API when LLM_MODE=batch.
+    """
+    if LLM_MODE == "batch":
+        results = _run_batch_cached(requests)
+    else:
+        results = get_executor().run_all(requests)
+    for req, result in zip(requests, results):
+        _record_usage(req, result)
+    return results
+
+
+def complete(request: LLMRequest) -> LLMResult:
+    """Single request through the shared executor (cache + coalescing apply)."""
+    result = get_executor().complete(request)
+    _record_usage(request, result)
+    return result
+
+
+def _start_tier(request: LLMRequest) -> int:
+    """Long inputs skip the cheapest tier."""
+    if estimate_tokens(request.instructions + request.prompt) > LLM_ROUTE_LONG_INPUT_TOKENS:
+        return min(1, len(LLM_MODEL_TIERS) - 1)
+    return 0
+
+
+def _outcome(fut: "Future[LLMResult]", request: LLMRequest) -> LLMResult:
+    try:
+        return fut.result()
+    except Exception as e:
+        return LLMResult(model=request.model, error=e)
+
+
+def iter_results(requests: List[LLMRequest], stream: bool = False) -> Iterator[LLMEvent]:
+    """
+    Run requests like run_all, but yield events as they happen, in completion
+    order: with `stream`, text deltas while answers are generated, and one
+    event carrying the result per request. Events are yielded on the calling
+    thread, so consumers may update UIs directly. Batch mode yields the
+    results once the batch is done.
+    """
+    if LLM_MODE == "batch":
+        for idx, result in enumerate(run_all(requests)):
+            yield LLMEvent(idx, result=result)
+        return
+
+    events: "queue.Queue[LLMEvent]" = queue.Queue()
+    executor = get_executor()
+    for idx, req in enumerate(requests):
+        on_delta = (lambda delta, idx=idx: events.put(LLMEvent(idx, delta=delta))) if stream else None
+        fut = executor.submit(req, on_delta)
+        fut.add_done_callback(lambda f, idx=idx, req=req: events.put(LLMEvent(idx, result=_outcome(f, req))))
+
+    remaining = len(requests)
+    while remaining:
+        event = events.get()
+        if event.result is not None:
+            _record_usage(requests[event.index], event.result)
+            remaining -= 1
+        yield event
+
+
+def iter_cascade(
+    requests: List[LLMRequest],
+    accept: Callable[[int, LLMResult], bool],
+    stream: bool = False,
+) -> Iterator[LLMEvent]:
+    """
+    iter_results routed through LLM_MODEL_TIERS: each request starts on the
+    cheapest suitable model, and is re-sent one tier up while
+    `accept(index, result)` rejects its answer (or the call failed) and a
+    stronger tier is left; a `restart` event then voids its streamed text. If
+    an escalated call fails, the cheaper answer is kept. Each request's final
+    result is yielded exactly once.
+    """
+    tiers = [_start_tier(req) for req in requests]
+    results: List[Optional[LLMResult]] = [None] * len(requests)
+    pending = list(range(len(requests)))
+    while pending:
+        routed = [
+            dataclasses.replace(requests[i], model=LLM_MODEL_TIERS[tiers[i]]) for i in pending
+        ]
+        retry = []
+        for event in iter_results(routed, stream):
+            i = pending[event.index]
+            result = event.result
+            if result is None:
+                yield LLMEvent(i, delta=event.delta)
+                continue
+            if result.error is None or results[i] is None:
+                results[i] = result
+                if not (result.error is None and accept(i, result)) and tiers[i] + 1 < len(LLM_MODEL_TIERS):
+                    _record_escalation(routed[event.index].model)
+                    tiers[i] += 1
+                    retry.append(i)
+                    yield LLMEvent(i, restart=True)
+                    continue
+            yield LLMEvent(i, result=results[i])
+        pending = retry
+
+
+def run_cascade(
+    requests: List[LLMRequest],
+    accept: Callable[[int, LLMResult], bool],
+) -> List[LLMResult]:
+    """iter_cascade without streaming; returns results in input order."""
+    if len(LLM_MODEL_TIERS) < 2:
+        return run_all(requests)
+    results: List[Optional[LLMResult]] = [None] * len(requests)
+    for event in iter_cascade(requests, accept):
+        if event.result is not None:
+            results[event.index] = event.result
+    return results
+
+
+def _run_batch_cached(requests: List[LLMRequest]) -> List[LLMResult]:
+    """Batch mode: serve cache hits locally, send each distinct miss once."""
+    # Imported here: llm_batch builds on this module's request/result types
+    from .llm_batch import run_batch
+
+    results: List[Optional[LLMResult]] = []
+    to_send: Dict[str, LLMRequest] = {}
+    for req in requests:
+        cached = _cached_result(req)
+        results.append(cached)
+        if cached is not None:
+            _count(req.stage, "hits")
+        elif cache_key(req) in to_send:
+            _count(req.stage, "coalesced")
+        else:
+            _count(req.stage, "misses")
+            to_send[cache_key(req)] = req
+
+    fresh = dict(zip(to_send, run_batch(list(to_send.values()))))
+    for key, req in to_send.items():
+        _store_result(req, fresh[key])
+
+    return [
+        result if result is not None else dataclasses.replace(fresh[cache_key(req)])
+        for req, result in zip(requests, results)
+    ]
@@ -0,0 +1,143 @@
+import json
+import os
+import time
+import uuid
+from typing import Dict, List, Optional
+
+from openai import OpenAI
+
+from .config import (
+    OPENAI_API_KEY,
+    CACHE_DIR,
+    LLM_BATCH_POLL_SECONDS,
+    LLM_BATCH_TIMEOUT,
+)
+from .llm import LLMRequest, LLMResult
+
+
+BATCH_ENDPOINT = "/v1/responses"
+FINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+_client: Optional[OpenAI] = None
+
+
+def _get_client() -> OpenAI:
+    global _client
+    if _client is None:
+        _client = OpenAI(api_key=OPENAI_API_KEY)
+    return _client
+
+
+def write_batch_file(requests: List[LLMRequest], custom_ids: List[str], path: str) -> str:
+    """Write requests in the Batch API JSONL format (one Responses call per line)."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        for custom_id, req in zip(custom_ids, requests):
+            line = {
+                "custom_id": custom_id,
+                "method": "POST",
+                "url": BATCH_ENDPOINT,
+                "body": {
+                    "model": req.model,
+                    "instructions": req.instructions,
+                    "input": req.prompt,
+                    "max_output_tokens": req.max_output_tokens,
+                },
+            }
+            f.write(json.dumps(line, ensure_ascii=False) + "\n")
+    return path
+
+
+def _output_text(body: dict) -> str:
+    """Concatenate output_text parts of a Responses API body."""
+    parts = []
+    for item in body.get("output") or []:
+        if item.get("type") != "message":
+            continue
+        for content in item.get("content") or []:
+            if content.get("type") == "output_text":
+                parts.append(content.get("text") or "")
+    return "".join(parts)
+
+
+def parse_batch_output(content: str, model: str = "") -> Dict[str, LLMResult]:
+    """Map custom_id → LLMResult from a batch output (or error) JSONL file."""
+    results: Dict[str, LLMResult] = {}
+    for line in content.splitlines():
+        if not line.strip():
+            continue
+        entry = json.loads(line)
+        custom_id = entry.get("custom_id")
+        response = entry.get("response") or {}
+        body = response.get("body") or {}
+
+        if entry.get("error") or response.get("status_code", 200) >= 400:
+            error = entry.get("error") or body.get("error") or {}
+            message = error.get("message") if isinstance(error, dict) else str(error)
+            results[custom_id] = LLMResult(
+                model=model, error=RuntimeError(f"Batch request failed: {message}")
+            )
+            continue
+
+        usage = body.get("usage") or {}
+        results[custom_id] = LLMResult(
+            text=_output_text(body),
+            model=body.get("model", model),
+            input_tokens=usage.get("input_tokens", 0),
+            output_tokens=usage.get("output_tokens", 0),
+            attempts=1,
+        )
+    return results
+
+
+def run_batch(requests: List[LLMRequest]) -> List[LLMResult]:
+    """
+    Run requests through the OpenAI Batch API: write a JSONL file, upload it,
+    create the batch, poll until it finishes, then map results back by
+    custom_id. Returns results in input order; requests missing from the
+    output come back with an error set.
+    """
+    if not requests:
+        return []
+
+    stage = requests[0].stage
+    custom_ids = [f"{req.stage}-{idx}" for idx, req in enumerate(requests)]
+    path = os.path.join(CACHE_DIR, "batches", f"{stage}-{int(time.time())}-{uuid.uuid4().hex[:8]}.jsonl")
+    write_batch_file(requests, custom_ids, path)
+
+    try:
+        client = _get_client()
+        with open(path, "rb") as f:
+            uploaded = client.files.create(file=f, purpose="batch")
+        batch = client.batches.create(
+            input_file_id=uploaded.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window="24h",
+        )
+        print(f"[llm_batch] Submitted {len(requests)} {stage} requests as batch {batch.id}")
+
+        deadline = time.monotonic() + LLM_BATCH_TIMEOUT
+        while batch.status not in FINAL_STATUSES:
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Batch {batch.id} still {batch.status} after {LLM_BATCH_TIMEOUT}s")
+            time.sleep(LLM_BATCH_POLL_SECONDS)
+            batch = client.batches.retrieve(batch.id)
+            print(f"[llm_batch] Batch {batch.id}: {batch.status}")
+
+        results: Dict[str, LLMResult] = {}
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if file_id:
+                content = client.files.content(file_id).text
+                results.update(parse_batch_output(content, requests[0].model))
+
+    except Exception as e:
+        print(f"[llm_batch] Batch for {stage} failed: {repr(e)}")
+        return [LLMResult(model=req.model, error=e) for req in requests]
+
+    missing = RuntimeError(f"No result in batch {batch.id} ({batch.status})")
+    return [
+        results.get(custom_id) or LLMResult(model=req.model, error=missing)
+        for custom_id, req in zip(custom_ids, requests)
+    ]
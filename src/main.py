@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Optional
 
 from . import (
     scope,
@@ -8,7 +8,12 @@ from . import (
     summarize,
     verify,
     export_excel,
+    llm,
+    metrics,
+    pipeline,
+    prefetch,
 )
+from .config import SUMMARY_MODE, METRICS_PORT, PIPELINE_MODE, LLM_MODE, SPECULATIVE_PREFETCH
 from .models import StrategyRecord
 
 
@@ -23,6 +28,45 @@ def ask_yes_no(prompt: str) -> bool:
         print("Please answer with 'y' or 'n'.")
 
 
+def print_summary_sentence(rec: StrategyRecord, sentence: str) -> None:
+    print(f"[{rec.country}] {sentence}")
+
+
+def print_summary_restart(rec: StrategyRecord) -> None:
+    print(f"[{rec.country}] Streamed lines above discarded; regenerating with a stronger model...")
+
+
+def print_verification(rec: StrategyRecord) -> None:
+    statuses = {s.status for s in rec.summary_sentences if s.status}
+    status_display = ", ".join(sorted(statuses)) or "unknown"
+    print(f"- {rec.country}: {status_display}")
+
+
+def print_record_summary(rec: StrategyRecord) -> None:
+    for s in rec.summary_sentences:
+        print_summary_sentence(rec, f"{s.sentence} ({s.status or 'unknown'})")
+    print_verification(rec)
+
+
+def print_run_report() -> None:
+    """Per-stage timing / HTTP / LLM table, and the JSON run report."""
+    print("\n>>> Run summary:")
+    for line in metrics.format_summary_table():
+        print(line)
+    print(f"Run report written to {metrics.write_report()}")
+
+
+def print_pipeline_progress(stage: str, rec: StrategyRecord) -> None:
+    if stage == "search":
+        print(f"[search] {rec.country}: {rec.primary_link}")
+    elif stage == "scrape":
+        print(f"[scrape] {rec.country}: {len(rec.raw_text or '')} characters")
+    elif stage == "summarize":
+        print(f"[summarize] {rec.country}: {len(rec.summary_sentences)} sentences")
+    else:
+        print_record_summary(rec)
+
+
 def approve_or_edit_strategies(records: List[StrategyRecord]) -> List[StrategyRecord]:
     """Show the proposed country/strategy list and allow basic edits (removals)."""
     print("\n>>> Proposed country & strategy list:")
@@ -59,8 +103,71 @@ def approve_or_edit_strategies(records: List[StrategyRecord]) -> List[StrategyRe
     return records
 
 
+def run_stages(
+    records: List[StrategyRecord],
+    research_focus: str,
+    prefetcher: Optional[prefetch.Prefetcher] = None,
+) -> List[StrategyRecord]:
+    """
+    Steps 3–6 one stage at a time for all records, with link approval.
+    With a `prefetcher`, links and pages come from its background work.
+    """
+    # 3) LINK EXTRACTION (Step 3) – user review/approval (simple yes/no)
+    if prefetcher:
+        records = prefetcher.links(records)
+    else:
+        records = search_links.populate_links(records)
+    print("\n>>> Links identified (showing primary link per country):")
+    for rec in records:
+        print(f"- {rec.country}: {rec.primary_link}")
+
+    if not ask_yes_no(
+        "\nDo you approve these links and want to proceed to scraping and summarization?"
+    ):
+        print("Stopping workflow before scraping.")
+        if prefetcher:
+            prefetcher.keep([])
+        return []
+
+    # 4) SCRAPING (Step 4)
+    if prefetcher:
+        records = prefetcher.pages(records)
+    else:
+        records = scrape.fetch_all(records)
+    print("\nRaw text fetched for all approved links.")
+
+    # Results are printed per record as they arrive
+    if SUMMARY_MODE == "fused":
+        # 5 + 6) SUMMARY GENERATION AND VERIFICATION IN ONE CALL
+        print("\n>>> Summaries and verification (as they complete):")
+        records = summarize.summarize_and_verify_all(
+            records, research_focus, on_record=print_record_summary
+        )
+        print("Summaries created and verified.")
+    else:
+        # 5) SUMMARY GENERATION (Step 5)
+        print("\n>>> Summaries (streaming):")
+        records = summarize.summarize_all(
+            records,
+            research_focus,
+            on_sentence=print_summary_sentence,
+            on_restart=print_summary_restart,
+        )
+        print("Summaries created.")
+
+        # 6) VERIFICATION (Step 6) + FINAL APPROVAL
+        # Quick console summary for user review
+        print("\n>>> Verification overview:")
+        records = verify.verify_all(records, research_focus, on_record=print_verification)
+        print("Verification completed.")
+
+    return records
+
+
 def run_pipeline(user_request: str) -> None:
     print(">>> Starting pipeline...")
+    metrics.reset()
+    metrics.start_metrics_server(METRICS_PORT)
 
     # 1) SCOPE CLARIFICATION + APPROVAL (Step 1 in spec)
     research_focus = scope.clarify_research_focus(user_request)
@@ -84,51 +191,56 @@ def run_pipeline(user_request: str) -> None:
         print("No strategies were generated. Exiting.")
         return
 
+    streaming = PIPELINE_MODE == "streaming" and LLM_MODE != "batch"
+
+    # Search and scrape in the background while the analyst reviews
+    prefetcher = None
+    if SPECULATIVE_PREFETCH and not streaming:
+        prefetcher = prefetch.Prefetcher(records)
+
     records = approve_or_edit_strategies(records)
+    if prefetcher:
+        prefetcher.keep(records)
     if not records:
+        if prefetcher:
+            prefetcher.close()
         return  # user chose to stop
 
-    # 3) LINK EXTRACTION (Step 3) – user review/approval (simple yes/no)
-    records = search_links.populate_links(records)
-    print("\n>>> Links identified (showing primary link per country):")
-    for rec in records:
-        print(f"- {rec.country}: {rec.primary_link}")
-
-    if not ask_yes_no(
-        "\nDo you approve these links and want to proceed to scraping and summarization?"
-    ):
-        print("Stopping workflow before scraping.")
-        return
-
-    # 4) SCRAPING (Step 4)
-    records = scrape.fetch_all(records)
-    print("\nRaw text fetched for all approved links.")
-
-    # 5) SUMMARY GENERATION (Step 5)
-    records = summarize.summarize_all(records)
-    print("Summaries created.")
-
-    # 6) VERIFICATION (Step 6) + FINAL APPROVAL
-    records = verify.verify_all(records)
-    print("Verification completed.")
-
-    # Quick console summary for user review
-    print("\n>>> Verification overview:")
-    for rec in records:
-        statuses = {s.status for s in rec.summary_sentences if s.status}
-        status_display = ", ".join(sorted(statuses)) or "unknown"
-        print(f"- {rec.country}: {status_display}")
+    if streaming:
+        # 3–6) PER-RECORD STREAMING: search, scrape, summarize and verify each
+        # record on its own (no link approval step in this mode)
+        print("\n>>> Streaming pipeline (results per record as they complete):")
+        records = pipeline.research_pipeline(research_focus).run(
+            records, on_progress=print_pipeline_progress
+        )
+    else:
+        records = run_stages(records, research_focus, prefetcher)
+        if prefetcher:
+            prefetcher.close()
+        if not records:
+            return  # user chose to stop
+
+    print("\n>>> LLM response cache:")
+    for line in llm.format_cache_stats():
+        print(f"- {line}")
+
+    print("\n>>> LLM usage per model:")
+    for line in llm.format_usage_stats():
+        print(f"- {line}")
 
     if not ask_yes_no(
         "\nDo you approve these summaries and verification results to be exported to Excel?"
     ):
         print("User did not approve final summaries. Exiting without export.")
+        print_run_report()
         return
 
     # 7) EXCEL EXPORT (Step 7)
     export_excel.export_to_excel(records)
     print("Exported deep_search_results.xlsx")
 
+    print_run_report()
+
 
 if __name__ == "__main__":
     user_prompt = input("\nEnter your research request: ")
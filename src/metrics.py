@@ -0,0 +1,315 @@
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Union
+
+from .config import RUN_REPORT_PATH
+from .models import StrategyRecord
+
+
+# Everything below is process-wide and guarded by one lock; stages call the
+# observe_* / record_time helpers from any thread.
+_lock = threading.Lock()
+_started = time.time()
+
+# stage -> {"runs", "seconds"}; seconds are wall-clock time with at least one
+# run of the stage in progress, so concurrent and nested runs are not added up
+_stages: Dict[str, Dict[str, float]] = {}
+# stage -> [runs in progress, perf_counter() when the first of them started]
+_active: Dict[str, list] = {}
+# per thread: "stages" = names of the stage blocks open on that thread
+_thread = threading.local()
+# "Country | Strategy" -> {stage: seconds}
+_records: Dict[str, Dict[str, float]] = {}
+# stage -> {"requests", "bytes", "seconds", "statuses": {code: count}}
+# (status 0 = failed without a response)
+_http: Dict[str, Dict] = {}
+# (stage, model) -> {"calls", "cached", "errors", "input_tokens", "output_tokens",
+#                    "cost", "latency"}
+_llm: Dict[tuple, Dict[str, float]] = {}
+# stage -> {"retries", "llm_skipped", ...}
+_counters: Dict[str, Dict[str, int]] = {}
+# Per-run state kept by other modules, cleared by reset() (see on_reset)
+_reset_hooks: List[Callable[[], None]] = []
+
+
+def _record_key(record: Union[StrategyRecord, str]) -> str:
+    if isinstance(record, StrategyRecord):
+        return f"{record.country} | {record.strategy_name}"
+    return record
+
+
+def on_reset(fn: Callable[[], None]) -> Callable[[], None]:
+    """Decorator: also call `fn` when a new run starts (module-level stats)."""
+    _reset_hooks.append(fn)
+    return fn
+
+
+def reset() -> None:
+    """Start a new run (the Streamlit app reuses the process)."""
+    global _started
+    with _lock:
+        _started = time.time()
+        _stages.clear()
+        _active.clear()
+        _records.clear()
+        _http.clear()
+        _llm.clear()
+        _counters.clear()
+    for fn in _reset_hooks:
+        fn()
+
+
+def add_stage_time(stage: str, seconds: float) -> None:
+    with _lock:
+        stats = _stages.setdefault(stage, {"runs": 0, "seconds": 0.0})
+        stats["runs"] += 1
+        stats["seconds"] += seconds
+
+
+@contextmanager
+def stage(name: str):
+    """
+    Time a block as (part of) a pipeline stage. Blocks of the same stage that
+    overlap (worker threads) count the wall-clock time they span together,
+    once; a block nested in one of the same stage on its thread (a decorated
+    call inside a timed block) is not counted again.
+    """
+    opened = _thread.__dict__.setdefault("stages", set())
+    if name in opened:
+        yield
+        return
+    opened.add(name)
+    with _lock:
+        active = _active.setdefault(name, [0, 0.0])
+        if not active[0]:
+            active[1] = time.perf_counter()
+        active[0] += 1
+    try:
+        yield
+    finally:
+        opened.discard(name)
+        with _lock:
+            active = _active.get(name)
+            if active is not None:  # else reset() started a new run meanwhile
+                active[0] -= 1
+                stats = _stages.setdefault(name, {"runs": 0, "seconds": 0.0})
+                stats["runs"] += 1
+                if not active[0]:
+                    stats["seconds"] += time.perf_counter() - active[1]
+
+
+def timed_stage(name: str):
+    """Decorator form of `stage`."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record_time(record: Union[StrategyRecord, str], stage: str, seconds: float) -> None:
+    """Time one record spent in one stage (added up over repeated calls)."""
+    with _lock:
+        stages = _records.setdefault(_record_key(record), {})
+        stages[stage] = stages.get(stage, 0.0) + seconds
+
+
+def observe_http(stage: str, status: int, nbytes: int = 0, seconds: float = 0.0) -> None:
+    """One HTTP request (or SDK call) made by `stage`; status 0 = no response."""
+    with _lock:
+        stats = _http.setdefault(
+            stage, {"requests": 0, "bytes": 0, "seconds": 0.0, "statuses": {}}
+        )
+        stats["requests"] += 1
+        stats["bytes"] += nbytes
+        stats["seconds"] += seconds
+        stats["statuses"][status] = stats["statuses"].get(status, 0) + 1
+
+
+def observe_llm(
+    stage: str,
+    model: str,
+    input_tokens: int,
+    output_tokens: int,
+    cost: float,
+    latency: float,
+    cached: bool = False,
+    error: bool = False,
+) -> None:
+    with _lock:
+        stats = _llm.setdefault((stage, model), dict.fromkeys(
+            ("calls", "cached", "errors", "input_tokens", "output_tokens", "cost", "latency"), 0))
+        stats["calls"] += 1
+        stats["cached"] += cached
+        stats["errors"] += error
+        stats["input_tokens"] += input_tokens
+        stats["output_tokens"] += output_tokens
+        stats["cost"] += cost
+        stats["latency"] += latency
+
+
+def count(stage: str, name: str, n: int = 1) -> None:
+    """Bump a per-stage counter ("retries", "llm_skipped")."""
+    with _lock:
+        counters = _counters.setdefault(stage, {})
+        counters[name] = counters.get(name, 0) + n
+
+
+def snapshot() -> dict:
+    """Everything recorded so far, as JSON-serialisable data."""
+    with _lock:
+        return {
+            "started_at": _started,
+            "elapsed_seconds": time.time() - _started,
+            "stages": {name: dict(stats) for name, stats in _stages.items()},
+            "records": {key: dict(stages) for key, stages in _records.items()},
+            "http": {
+                name: dict(stats, statuses={str(k): v for k, v in stats["statuses"].items()})
+                for name, stats in _http.items()
+            },
+            "llm": [
+                dict(stats, stage=stage, model=model)
+                for (stage, model), stats in _llm.items()
+            ],
+            "counters": {name: dict(counters) for name, counters in _counters.items()},
+        }
+
+
+def write_report(path: str = RUN_REPORT_PATH) -> str:
+    """Write the run report as JSON; returns the path."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(snapshot(), f, indent=2)
+    return path
+
+
+def summary_rows() -> List[dict]:
+    """
+    One row per stage: wall time, HTTP requests / bytes / errors, retries,
+    LLM calls made and skipped, tokens and cost.
+    """
+    data = snapshot()
+    names = list(data["stages"])
+    names += [n for n in data["http"] if n not in names]
+    names += [row["stage"] for row in data["llm"] if row["stage"] not in names]
+    names += [n for n in data["counters"] if n not in names]
+
+    rows = []
+    for name in names:
+        http = data["http"].get(name, {})
+        llm = [row for row in data["llm"] if row["stage"] == name]
+        errors = sum(
+            count for status, count in http.get("statuses", {}).items()
+            if int(status) == 0 or int(status) >= 400
+        )
+        counters = data["counters"].get(name, {})
+        rows.append({
+            "stage": name,
+            "seconds": round(data["stages"].get(name, {}).get("seconds", 0.0), 2),
+            "http_requests": http.get("requests", 0),
+            "http_bytes": http.get("bytes", 0),
+            "http_errors": errors,
+            "retries": counters.get("retries", 0),
+            "llm_calls": sum(row["calls"] for row in llm),
+            "llm_skipped": counters.get("llm_skipped", 0),
+            "llm_tokens": sum(row["input_tokens"] + row["output_tokens"] for row in llm),
+            "llm_cost_usd": round(sum(row["cost"] for row in llm), 4),
+        })
+    return rows
+
+
+def format_summary_table() -> List[str]:
+    columns = ["stage", "seconds", "http_requests", "http_bytes", "http_errors", "retries",
+               "llm_calls", "llm_skipped", "llm_tokens", "llm_cost_usd"]
+    rows = summary_rows()
+    widths = {c: max([len(c)] + [len(str(r[c])) for r in rows]) for c in columns}
+    lines = ["  ".join(c.ljust(widths[c]) for c in columns)]
+    for row in rows:
+        lines.append("  ".join(str(row[c]).ljust(widths[c]) for c in columns))
+    return lines
+
+
+def _label(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+
+def prometheus_text() -> str:
+    """Current metrics in the Prometheus text exposition format."""
+    data = snapshot()
+    out = [
+        "# TYPE pipeline_stage_seconds_total counter",
+        *(
+            f'pipeline_stage_seconds_total{{stage="{_label(name)}"}} {stats["seconds"]:.6f}'
+            for name, stats in data["stages"].items()
+        ),
+        "# TYPE pipeline_http_requests_total counter",
+        *(
+            f'pipeline_http_requests_total{{stage="{_label(name)}",status="{status}"}} {count}'
+            for name, stats in data["http"].items()
+            for status, count in stats["statuses"].items()
+        ),
+        "# TYPE pipeline_http_bytes_total counter",
+        *(
+            f'pipeline_http_bytes_total{{stage="{_label(name)}"}} {stats["bytes"]}'
+            for name, stats in data["http"].items()
+        ),
+        "# TYPE pipeline_events_total counter",
+        *(
+            f'pipeline_events_total{{stage="{_label(name)}",event="{_label(event)}"}} {n}'
+            for name, counters in data["counters"].items()
+            for event, n in counters.items()
+        ),
+        "# TYPE pipeline_llm_calls_total counter",
+        "# TYPE pipeline_llm_tokens_total counter",
+        "# TYPE pipeline_llm_cost_usd_total counter",
+    ]
+    for row in data["llm"]:
+        labels = f'stage="{_label(row["stage"])}",model="{_label(row["model"])}"'
+        out.append(f"pipeline_llm_calls_total{{{labels}}} {row['calls']}")
+        out.append(f'pipeline_llm_tokens_total{{{labels},kind="input"}} {row["input_tokens"]}')
+        out.append(f'pipeline_llm_tokens_total{{{labels},kind="output"}} {row["output_tokens"]}')
+        out.append(f"pipeline_llm_cost_usd_total{{{labels}}} {row['cost']:.6f}")
+    return "\n".join(out) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = prometheus_text().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+_server: Optional[ThreadingHTTPServer] = None
+
+
+def start_metrics_server(port: int) -> Optional[ThreadingHTTPServer]:
+    """Serve /metrics on `port` from a daemon thread (once per process)."""
+    global _server
+    with _lock:
+        if _server is None and port:
+            try:
+                _server = ThreadingHTTPServer(("127.0.0.1", port), _MetricsHandler)
+            except OSError as e:
+                print(f"[metrics] Could not listen on port {port}: {repr(e)}")
+                return None
+            threading.Thread(target=_server.serve_forever, name="metrics", daemon=True).start()
+            print(f"[metrics] Prometheus metrics on http://127.0.0.1:{port}/metrics")
+        return _server
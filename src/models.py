@@ -1,12 +1,34 @@
 from dataclasses import dataclass, field
 from typing import List, Optional, Dict
 
+# Start of the raw_text scrape.py leaves when a link yields no usable text
+UNREADABLE_TEXT = "No readable content could be extracted from this URL"
+
 @dataclass
 class SummarySentence:
     sentence: str
     status: Optional[str] = None           # "Verified" / "Partially verified" / "Not verified"
     supporting_quote: Optional[str] = None
 
+@dataclass
+class FetchOutcome:
+    """How scraping went for a record (set by scrape.fetch_all)."""
+    status: str                            # "ok", "cached", "http_error", "network_error",
+                                           # "download_error", "throttled", "parse_error",
+                                           # "placeholder", "no_link"
+    url: Optional[str] = None              # link the text came from (primary if none worked)
+    http_status: Optional[int] = None
+    content_type: str = ""
+    nbytes: int = 0
+    extractor: str = ""
+    attempts: int = 0                      # downloads, incl. throttle retries and fallback links
+    sources: int = 0                       # documents whose text is in raw_text
+    urls: List[str] = field(default_factory=list)  # their links, in merge order
+
+    @property
+    def ok(self) -> bool:
+        return self.status in ("ok", "cached")
+
 @dataclass
 class StrategyRecord:
     country: str
@@ -15,7 +37,15 @@ class StrategyRecord:
     secondary_links: List[str] = field(default_factory=list)
 
     raw_text: Optional[str] = None
+    fetch: Optional[FetchOutcome] = None
     summary_sentences: List[SummarySentence] = field(default_factory=list)
 
     # Optional meta
     notes: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def fetch_failed(self) -> bool:
+        """True when raw_text is only a placeholder (nothing worth an LLM call)."""
+        if self.fetch is None:
+            return (self.raw_text or "").startswith(UNREADABLE_TEXT)
+        return not self.fetch.ok
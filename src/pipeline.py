@@ -0,0 +1,138 @@
+import queue
+import threading
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+from . import metrics
+from .config import (
+    SUMMARY_MODE,
+    PIPELINE_QUEUE_SIZE,
+    PIPELINE_SEARCH_WORKERS,
+    PIPELINE_SCRAPE_WORKERS,
+    PIPELINE_SUMMARIZE_WORKERS,
+    PIPELINE_VERIFY_WORKERS,
+)
+from .models import StrategyRecord
+
+
+_STOP = object()
+
+ProgressCallback = Callable[[str, StrategyRecord], None]
+
+
+@dataclass
+class PipelineStage:
+    name: str
+    fn: Callable[[StrategyRecord], object]   # works on one record, in place
+    concurrency: int = 1
+
+
+class Pipeline:
+    """
+    Streaming per-record execution: every record moves through the stages on
+    its own, so a slow record only holds up itself.
+
+    Each stage runs `concurrency` worker threads reading from a bounded input
+    queue (PIPELINE_QUEUE_SIZE); a full queue blocks the stage before it
+    (backpressure). A stage that raises is logged and the record moves on,
+    since every stage already falls back to placeholder content.
+
+    Stage timings (metrics.stage) are the wall-clock time each stage had a
+    record in progress, not the sum over its workers; per-record times are
+    recorded by the stage functions themselves.
+    """
+
+    def __init__(self, stages: List[PipelineStage], queue_size: int = PIPELINE_QUEUE_SIZE) -> None:
+        self.stages = stages
+        self.queue_size = max(1, queue_size)
+
+    def run(
+        self,
+        records: List[StrategyRecord],
+        on_progress: Optional[ProgressCallback] = None,
+    ) -> List[StrategyRecord]:
+        """
+        Push all records through the stages; returns them in input order.
+        `on_progress(stage_name, record)` is called on the calling thread each
+        time a record finishes a stage.
+        """
+        if not records or not self.stages:
+            return records
+
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in self.stages]
+        events: "queue.Queue[tuple]" = queue.Queue()
+
+        def worker(pos: int) -> None:
+            stage, inbox = self.stages[pos], queues[pos]
+            while True:
+                item = inbox.get()
+                if item is _STOP:
+                    return
+                idx = item
+                try:
+                    with metrics.stage(stage.name):
+                        stage.fn(records[idx])
+                except Exception as e:
+                    print(f"[pipeline] {stage.name} failed for {records[idx].country}: {repr(e)}")
+                events.put((stage.name, idx))
+                if pos + 1 < len(queues):
+                    queues[pos + 1].put(idx)  # blocks while the next stage is saturated
+
+        threads = []
+        for pos, stage in enumerate(self.stages):
+            for n in range(max(1, stage.concurrency)):
+                t = threading.Thread(
+                    target=worker, args=(pos,), name=f"pipeline-{stage.name}-{n}", daemon=True
+                )
+                t.start()
+                threads.append((pos, t))
+
+        def feed() -> None:
+            for idx in range(len(records)):
+                queues[0].put(idx)
+
+        threading.Thread(target=feed, name="pipeline-feed", daemon=True).start()
+
+        last = self.stages[-1].name
+        finished = 0
+        while finished < len(records):
+            stage_name, idx = events.get()
+            if stage_name == last:
+                finished += 1
+            if on_progress:
+                on_progress(stage_name, records[idx])
+
+        for pos, _ in threads:
+            queues[pos].put(_STOP)
+        return records
+
+
+def research_pipeline(research_focus: str = "") -> Pipeline:
+    """search → scrape → summarize → verify (or one fused LLM stage), per record."""
+    # Imported here so the engine itself stays independent of the stages
+    from . import scrape, search_links, summarize, verify
+
+    stages = [
+        PipelineStage("search", search_links.find_links, PIPELINE_SEARCH_WORKERS),
+        PipelineStage("scrape", lambda rec: scrape.fetch_all([rec]), PIPELINE_SCRAPE_WORKERS),
+    ]
+    if SUMMARY_MODE == "fused":
+        stages.append(PipelineStage(
+            "summarize_verify",
+            lambda rec: summarize.summarize_and_verify_all([rec], research_focus),
+            PIPELINE_SUMMARIZE_WORKERS,
+        ))
+    else:
+        stages += [
+            PipelineStage(
+                "summarize",
+                lambda rec: summarize.summarize_all([rec], research_focus),
+                PIPELINE_SUMMARIZE_WORKERS,
+            ),
+            PipelineStage(
+                "verify",
+                lambda rec: verify.verify_all([rec], research_focus),
+                PIPELINE_VERIFY_WORKERS,
+            ),
+        ]
+    return Pipeline(stages)
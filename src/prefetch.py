@@ -0,0 +1,94 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Dict, List
+
+from . import metrics, scrape, search_links
+from .config import SEARCH_CONCURRENCY, SCRAPE_IO_WORKERS
+from .models import StrategyRecord
+
+
+class Prefetcher:
+    """
+    Speculative link search and scraping while the CLI waits for approvals.
+
+    Every proposed record is searched in the background as soon as it exists,
+    and its page is scraped as soon as its link is found; records work in
+    place on the same StrategyRecord objects the CLI shows. `keep()` drops the
+    records the analyst removed or rejected: queued work for them is
+    cancelled, and a search already running is not followed by a scrape.
+
+    Searches and scrapes run per record on worker threads; metrics.stage
+    counts their overlapping time once, so the "search" and "scrape" rows
+    show how long each stage was busy, not the sum over records.
+    """
+
+    def __init__(self, records: List[StrategyRecord]) -> None:
+        workers = max(1, min(SEARCH_CONCURRENCY, len(records)))
+        self._search_pool = ThreadPoolExecutor(workers, thread_name_prefix="prefetch-search")
+        self._scrape_pool = ThreadPoolExecutor(
+            max(1, SCRAPE_IO_WORKERS), thread_name_prefix="prefetch-scrape"
+        )
+        self._lock = threading.Lock()
+        self._kept = {id(rec) for rec in records}
+        self._scrapes: Dict[int, Future] = {}
+        self._searches: Dict[int, Future] = {
+            id(rec): self._search_pool.submit(self._search, rec) for rec in records
+        }
+
+    def _search(self, rec: StrategyRecord) -> None:
+        with metrics.stage("search"):
+            search_links.find_links(rec)
+        with self._lock:
+            if id(rec) in self._kept:
+                self._scrapes[id(rec)] = self._scrape_pool.submit(scrape.fetch_all, [rec])
+
+    def keep(self, records: List[StrategyRecord]) -> None:
+        """Cancel speculative work for every record not in `records`."""
+        with self._lock:
+            self._kept &= {id(rec) for rec in records}
+            dropped = [
+                future
+                for futures in (self._searches, self._scrapes)
+                for key, future in futures.items()
+                if key not in self._kept and not future.done()
+            ]
+        cancelled = sum(future.cancel() for future in dropped)
+        if dropped:
+            print(
+                f"[prefetch] Dropped {len(dropped)} speculative jobs "
+                f"({cancelled} cancelled before starting)"
+            )
+
+    def links(self, records: List[StrategyRecord]) -> List[StrategyRecord]:
+        """Wait for the links of `records` (searching any that were never prefetched)."""
+        for rec in records:
+            future = self._searches.get(id(rec))
+            try:
+                if future is None:
+                    raise KeyError("not prefetched")
+                future.result()
+            except Exception as e:
+                print(f"[prefetch] Search for {rec.country} redone: {repr(e)}")
+                self._search(rec)
+        return records
+
+    def pages(self, records: List[StrategyRecord]) -> List[StrategyRecord]:
+        """Wait for the scraped text of `records`; scrapes whatever is missing."""
+        with self._lock:
+            futures = {id(rec): self._scrapes.get(id(rec)) for rec in records}
+        wait([f for f in futures.values() if f is not None])
+
+        missing = []
+        for rec in records:
+            future = futures[id(rec)]
+            if future is None or future.cancelled() or future.exception() is not None:
+                missing.append(rec)
+        if missing:
+            scrape.fetch_all(missing)
+        return records
+
+    def close(self) -> None:
+        """Cancel whatever is still queued and release the worker threads."""
+        self.keep([])
+        self._search_pool.shutdown(wait=False)
+        self._scrape_pool.shutdown(wait=False)
@@ -1,9 +1,8 @@
-from openai import OpenAI
-from .config import OPENAI_API_KEY
-
-client = OpenAI(api_key=OPENAI_API_KEY)
+from . import metrics
+from .llm import LLMRequest, complete
 
 
+@metrics.timed_stage("scope")
 def clarify_research_focus(user_request: str) -> str:
     """
     Takes the user's free-text request and returns a single, clear
@@ -37,12 +36,16 @@ Return ONLY the final sentence, no bullet points, no quotes, no explanation.
 """
 
     try:
-        response = client.responses.create(
-            model="gpt-4.1-mini",
-            instructions="Rewrite the request as a single clear research focus sentence.",
-            input=prompt,
+        result = complete(
+            LLMRequest(
+                stage="scope",
+                instructions="Rewrite the request as a single clear research focus sentence.",
+                prompt=prompt,
+            )
         )
-        focus = (response.output_text or "").strip()
+        if result.error is not None:
+            raise result.error
+        focus = (result.text or "").strip()
         # Safety fallback
         return focus or user_request
     except Exception as e:
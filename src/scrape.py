@@ -1,20 +1,114 @@
-from typing import List
+import hashlib
+import multiprocessing
+import os
+import re
+import tempfile
+import threading
+import time
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from typing import BinaryIO, Dict, List, Optional, Tuple, Union
 from io import BytesIO
 
-import requests
 import pdfplumber
-from bs4 import BeautifulSoup
+from bs4 import UnicodeDammit
+import pypdfium2 as pdfium
 
-from .models import StrategyRecord
+from . import extractors, http_client, metrics
+from .cache import DocumentStore
+from .dedupe import merge_texts
+from .domain_scheduler import THROTTLE_STATUSES, DomainScheduler, parse_retry_after
+from .config import (
+    SCRAPE_MAX_HTML_BYTES,
+    SCRAPE_MAX_PDF_BYTES,
+    SCRAPE_IO_WORKERS,
+    SCRAPE_CPU_WORKERS,
+    DOC_CACHE_ENABLED,
+    DOC_CACHE_MAX_BYTES,
+    HTML_EXTRACTOR,
+    PDF_PAGE_SELECTION,
+    PDF_MAX_PAGES,
+    PDF_CHAR_BUDGET,
+    SCRAPE_DOMAIN_INITIAL_WINDOW,
+    SCRAPE_DOMAIN_MAX_WINDOW,
+    SCRAPE_DOMAIN_TARGET_LATENCY,
+    SCRAPE_THROTTLE_RETRIES,
+    SCRAPE_SECONDARY_LINKS,
+)
+from .models import UNREADABLE_TEXT, FetchOutcome, StrategyRecord
 
 
-def _extract_pdf_text(content: bytes, max_pages: int = 5) -> str:
+CHUNK_SIZE = 64 * 1024
+SNIFF_BYTES = 1024
+MAX_TEXT_CHARS = 15000
+
+# Relevance scan for PDF page selection
+SCAN_MAX_PAGES = 600
+MIN_CONTENT_CHARS = 200
+SECTION_KEYWORDS = (
+    "objective", "goal", "vision", "priorit", "target", "measure", "action",
+    "programme", "program", "implementation", "pillar", "mission",
+)
+FRONT_MATTER_KEYWORDS = ("table of contents", "contents", "foreword", "preface", "acknowledg")
+STOPWORDS = {"the", "and", "for", "of", "on", "in", "to", "a", "an", "national", "plan", "strategy"}
+TOC_LINE = re.compile(r"(\.{3,}|…)\s*\d{1,4}\s*$|\s\d{1,4}\s*$")
+
+def _unreadable(reason: str = "") -> str:
+    """Placeholder raw_text for a link that yielded nothing (see UNREADABLE_TEXT)."""
+    return f"{UNREADABLE_TEXT}{reason}. This is a placeholder description based on the link only."
+
+
+_io_pool: Optional[ThreadPoolExecutor] = None
+_cpu_pool: Optional[ProcessPoolExecutor] = None
+_scheduler: Optional[DomainScheduler] = None
+_pool_lock = threading.Lock()
+
+document_store: Optional[DocumentStore] = (
+    DocumentStore(max_bytes=DOC_CACHE_MAX_BYTES) if DOC_CACHE_ENABLED else None
+)
+
+
+@dataclass
+class _Download:
+    """Result of the I/O half of a fetch; parsing happens separately."""
+    url: str
+    kind: str                 # "pdf", "html", "cached", "throttled" or "error"
+    html: str = ""            # decoded HTML (kind == "html")
+    raw: bytes = b""          # raw HTML bytes (kind == "html")
+    pdf_path: str = ""        # spooled temp file, caller deletes it (kind == "pdf")
+    query: str = ""           # strategy name + country, for PDF page relevance
+    text: str = ""            # stored text (kind == "cached") or placeholder (error / throttled)
+    content_hash: str = ""
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    retry_after: Optional[float] = None  # seconds from Retry-After (kind == "throttled")
+    seconds: float = 0.0
+    http_status: int = 0      # 0 = no response
+    content_type: str = ""
+    nbytes: int = 0           # body bytes read
+    extractor: str = ""       # how the text was / will be extracted (see _extractor_name)
+
+
+def _extract_pdf_text(
+    source: Union[bytes, str, BinaryIO], max_pages: int = PDF_MAX_PAGES
+) -> str:
     """
-    Extract text from a PDF byte stream.
+    Extract text from a PDF (raw bytes, a file path or a binary file object).
     To keep things fast, only the first `max_pages` pages are processed.
     """
+    if isinstance(source, bytes):
+        source = BytesIO(source)
+
     text_chunks = []
-    with pdfplumber.open(BytesIO(content)) as pdf:
+    with pdfplumber.open(source) as pdf:
         for i, page in enumerate(pdf.pages):
             if i >= max_pages:
                 break
@@ -23,83 +117,671 @@ def _extract_pdf_text(content: bytes, max_pages: int = 5) -> str:
     return "\n".join(text_chunks)
 
 
+def _query_terms(query: str) -> List[str]:
+    words = re.findall(r"\w+", query.lower())
+    return sorted({w for w in words if len(w) > 2 and w not in STOPWORDS})
+
+
+def _scan_pdf(path: str, query: str, max_pages: int, char_budget: int) -> List[int]:
+    """
+    Cheap relevance pass over a PDF using pdfium's text layer (much faster than
+    pdfplumber's layout analysis). Pages are scored on keyword hits for the
+    strategy name / country and typical section words, boosted when they fall
+    under a matching bookmark, and penalised when they look like covers,
+    forewords or tables of contents.
+    Returns the chosen page indices in document order.
+    """
+    terms = _query_terms(query)
+    pdf = pdfium.PdfDocument(path)
+    try:
+        n_pages = min(len(pdf), SCAN_MAX_PAGES)
+        texts = []
+        for i in range(n_pages):
+            page = pdf[i]
+            textpage = page.get_textpage()
+            texts.append(textpage.get_text_range())
+            textpage.close()
+            page.close()
+
+        # Bookmarks whose titles match give a boost to the pages they cover
+        outline_boost = [0.0] * n_pages
+        try:
+            marks = []
+            for bookmark in pdf.get_toc():
+                dest = bookmark.get_dest()
+                if dest is not None and dest.get_index() is not None:
+                    marks.append((dest.get_index(), bookmark.get_title().lower()))
+            marks.sort()
+            for pos, (start, title) in enumerate(marks):
+                if any(t in title for t in terms) or any(k in title for k in SECTION_KEYWORDS):
+                    end = marks[pos + 1][0] if pos + 1 < len(marks) else n_pages
+                    for i in range(start, min(end, start + 5, n_pages)):
+                        outline_boost[i] += 5.0
+        except Exception as e:
+            print(f"[fetch_all] Could not read PDF bookmarks: {repr(e)}")
+    finally:
+        pdf.close()
+
+    scores = []
+    for i, text in enumerate(texts):
+        lower = text.lower()
+        if len(lower.strip()) < MIN_CONTENT_CHARS:
+            scores.append(-1.0)  # cover, blank or image-only page
+            continue
+
+        score = 2.0 * sum(min(lower.count(t), 10) for t in terms)
+        score += sum(min(lower.count(k), 5) for k in SECTION_KEYWORDS)
+        score += outline_boost[i]
+
+        lines = [ln for ln in lower.splitlines() if ln.strip()]
+        if lines and sum(1 for ln in lines if TOC_LINE.search(ln)) / len(lines) > 0.4:
+            score *= 0.2
+        if any(k in lower[:300] for k in FRONT_MATTER_KEYWORDS):
+            score *= 0.3
+        scores.append(score)
+
+    chosen: List[int] = []
+    estimated_chars = 0
+    # Best first; ties go to the earlier page
+    for i in sorted(range(len(texts)), key=lambda i: (-scores[i], i)):
+        if len(chosen) >= max_pages or estimated_chars >= char_budget:
+            break
+        if scores[i] <= 0 and chosen:
+            break  # nothing relevant left
+        chosen.append(i)
+        estimated_chars += len(texts[i])
+    return sorted(chosen)
+
+
+def _extract_pdf_pages(path: str, pages: List[int], char_budget: int) -> List[Tuple[int, str]]:
+    """Extract the given pages with pdfplumber, stopping once `char_budget` is reached."""
+    results = []
+    total = 0
+    with pdfplumber.open(path) as pdf:
+        for i in pages:
+            if total >= char_budget:
+                break
+            page_text = pdf.pages[i].extract_text() or ""
+            results.append((i, page_text))
+            total += len(page_text)
+    return results
+
+
+class _Done:
+    """Already-computed stand-in for a Future (inline execution)."""
+    def __init__(self, value):
+        self.value = value
+
+    def result(self):
+        return self.value
+
+
+def _extract_pdf_relevant(
+    path: str,
+    query: str,
+    pool: Optional[Executor] = None,
+    workers: int = 1,
+) -> Tuple[str, float, bool]:
+    """
+    Relevance-driven PDF extraction: scan, pick the best pages anywhere in the
+    document, then extract them in parallel on `pool` (inline if None).
+    Returns (text, seconds, success) like `_extract_document`.
+    """
+    started = time.perf_counter()
+
+    def run(fn, *args):
+        return pool.submit(fn, *args) if pool else _Done(fn(*args))
+
+    try:
+        pages = run(_scan_pdf, path, query, PDF_MAX_PAGES, PDF_CHAR_BUDGET).result()
+
+        n_chunks = max(1, min(workers, len(pages)))
+        chunks = [pages[k::n_chunks] for k in range(n_chunks)]
+        futures = [run(_extract_pdf_pages, path, chunk, PDF_CHAR_BUDGET) for chunk in chunks if chunk]
+
+        extracted = sorted(item for fut in futures for item in fut.result())
+        text = "\n".join(page_text for _, page_text in extracted)[:PDF_CHAR_BUDGET]
+        return text, time.perf_counter() - started, True
+
+    except Exception as e:
+        print(f"[fetch_all] Error extracting pdf content: {repr(e)}")
+        if isinstance(e, BrokenProcessPool):
+            _discard_cpu_pool()
+        text = _unreadable()
+        return text, time.perf_counter() - started, False
+
+
 def _extract_html_text(html: str) -> str:
-    """Extract visible text from an HTML page."""
-    soup = BeautifulSoup(html, "html.parser")
+    """Extract visible text from an HTML page (backend set by HTML_EXTRACTOR)."""
+    return extractors.extract_html(html)
 
-    # Remove common noise
-    for tag in soup(["script", "style", "noscript"]):
-        tag.decompose()
 
-    body = soup.body or soup
-    text = body.get_text(separator="\n", strip=True)
-    return text
+def _decode_html(body: bytes, header_encoding: Optional[str] = None) -> str:
+    """
+    Decode an HTML body: the Content-Type charset when there is one, else
+    what UnicodeDammit finds (BOM, <meta charset>, strict UTF-8, detection,
+    then Windows-1252), so non-UTF-8 pages without a header charset stay
+    readable.
+    """
+    if header_encoding:
+        try:
+            return body.decode(header_encoding, errors="replace")
+        except LookupError:
+            pass
+    dammit = UnicodeDammit(body, user_encodings=["utf-8"], is_html=True)
+    if dammit.unicode_markup is not None:
+        return dammit.unicode_markup
+    return body.decode("utf-8", errors="replace")
 
 
-def _fetch_url_text(url: str) -> str:
+def _sniff_is_pdf(head: bytes, content_type: str, url: str) -> bool:
     """
-    Fetch and extract text from a URL.
-    - If PDF: use pdfplumber
-    - Else: treat as HTML
-    On any error (403, timeout, etc.), return a clear placeholder string.
+    Decide whether a response is a PDF.
+    Magic bytes win; headers and the URL suffix are only used when the body
+    gives no answer (e.g. it is empty).
     """
+    if b"%PDF-" in head[:SNIFF_BYTES]:
+        return True
+    if head.strip():
+        return False
+    return url.lower().endswith(".pdf") or "application/pdf" in content_type
+
+
+class _TooLarge(Exception):
+    pass
+
+
+def _extractor_name(kind: str, query: str = "") -> str:
+    """Identifies how text was extracted, so stored text is only reused like-for-like."""
+    if kind != "pdf":
+        return f"html:{HTML_EXTRACTOR}"
+    if PDF_PAGE_SELECTION == "relevant":
+        query_key = hashlib.sha1(" ".join(_query_terms(query)).encode()).hexdigest()[:10]
+        return f"pdf:relevant-{PDF_MAX_PAGES}-{PDF_CHAR_BUDGET}:{query_key}"
+    return f"pdf:first-{PDF_MAX_PAGES}"
+
+
+def _download(url: str, query: str = "") -> _Download:
+    """
+    Download a URL without parsing it.
+    - Known URLs are revalidated with If-None-Match / If-Modified-Since; a 304,
+      or a body whose hash matches a stored document, reuses the stored text
+    - The body is streamed: HTML stops downloading after SCRAPE_MAX_HTML_BYTES,
+      PDFs (detected from magic bytes) are spooled to a temporary file
+      (up to SCRAPE_MAX_PDF_BYTES)
+    Every response (or failure) is reported to the per-domain scheduler.
+    On any error (403, timeout, etc.), return a clear placeholder string;
+    429/503 come back as kind "throttled" so the caller can retry later.
+    """
+    started = time.perf_counter()
+    status = 0   # HTTP status for metrics (0 = no response)
+    nbytes = 0   # body bytes read
+    content_type = ""
+
+    def done(dl: _Download) -> _Download:
+        dl.seconds = time.perf_counter() - started
+        dl.http_status, dl.nbytes, dl.content_type = status, nbytes, content_type
+        if dl.kind in ("pdf", "html"):
+            dl.extractor = _extractor_name(dl.kind, query)
+        metrics.observe_http("scrape", status, nbytes, dl.seconds)
+        return dl
+
+    cached = document_store.lookup(url) if document_store else None
+    if cached and cached.extractor != _extractor_name(cached.kind, query):
+        cached = None  # stored text came from a different extractor, refetch
+    headers = {}
+    if cached:
+        if cached.etag:
+            headers["If-None-Match"] = cached.etag
+        if cached.last_modified:
+            headers["If-Modified-Since"] = cached.last_modified
+
     try:
-        resp = requests.get(url, timeout=25)
-
-        # If server returns an error code, don't crash – just log & fallback
-        if resp.status_code >= 400:
-            print(f"[fetch_all] HTTP {resp.status_code} for {url}")
-            return (
-                "No readable content could be extracted from this URL due to "
-                f"an HTTP error ({resp.status_code}). This is a placeholder description."
+        with http_client.get(url, stream=True, headers=headers, retry_throttled=False) as resp:
+            status = resp.status_code
+            etag = resp.headers.get("ETag")
+            last_modified = resp.headers.get("Last-Modified")
+            retry_after = parse_retry_after(resp.headers.get("Retry-After"))
+            _get_scheduler().record(
+                url, resp.status_code, resp.elapsed.total_seconds(), retry_after
             )
 
-        content_type = resp.headers.get("Content-Type", "").lower()
+            if resp.status_code == 304 and cached:
+                document_store.touch(url, etag, last_modified)
+                document_store.count(hit=True)
+                return done(_Download(url, "cached", text=cached.text, extractor=cached.extractor))
+
+            # If server returns an error code, don't crash – just log & fallback
+            if resp.status_code >= 400:
+                print(f"[fetch_all] HTTP {resp.status_code} for {url}")
+                kind = "throttled" if resp.status_code in THROTTLE_STATUSES else "error"
+                return done(_Download(
+                    url, kind, retry_after=retry_after,
+                    text=_unreadable(f" due to an HTTP error ({resp.status_code})"),
+                ))
+
+            content_type = resp.headers.get("Content-Type", "").lower()
+            chunks = resp.iter_content(chunk_size=CHUNK_SIZE)
+            digest = hashlib.sha256()
+
+            # Read just enough of the body to sniff the real content type
+            head = b""
+            for chunk in chunks:
+                head += chunk
+                if len(head) >= SNIFF_BYTES:
+                    break
+            digest.update(head)
+            nbytes = len(head)
+
+            if _sniff_is_pdf(head, content_type, url):
+                kind = "pdf"
+                tmp = tempfile.NamedTemporaryFile(suffix=".pdf", delete=False)
+                try:
+                    with tmp:
+                        tmp.write(head)
+                        size = len(head)
+                        for chunk in chunks:
+                            size += len(chunk)
+                            nbytes = size
+                            if size > SCRAPE_MAX_PDF_BYTES:
+                                raise _TooLarge()
+                            tmp.write(chunk)
+                            digest.update(chunk)
+                except _TooLarge:
+                    os.remove(tmp.name)
+                    print(f"[fetch_all] PDF larger than {SCRAPE_MAX_PDF_BYTES} bytes: {url}")
+                    return done(_Download(
+                        url, "error", text=_unreadable(" because the document is too large")
+                    ))
+                except BaseException:
+                    os.remove(tmp.name)
+                    raise
+                dl = _Download(url, "pdf", pdf_path=tmp.name, query=query)
 
-        # PDF by extension or content-type
-        if url.lower().endswith(".pdf") or "application/pdf" in content_type:
-            return _extract_pdf_text(resp.content)
+            else:
+                # Otherwise, assume HTML – stop reading at the byte ceiling
+                kind = "html"
+                body = bytearray(head)
+                for chunk in chunks:
+                    if len(body) >= SCRAPE_MAX_HTML_BYTES:
+                        break
+                    body.extend(chunk)
+                nbytes = len(body)
+                del body[SCRAPE_MAX_HTML_BYTES:]
+                digest.update(bytes(body[len(head):]))
 
-        # Otherwise, assume HTML
-        return _extract_html_text(resp.text)
+                encoding = resp.encoding if "charset=" in content_type else None
+                html = _decode_html(bytes(body), encoding)
+                dl = _Download(url, "html", html=html, raw=bytes(body))
+
+            dl.content_hash = digest.hexdigest()
+            dl.etag = etag
+            dl.last_modified = last_modified
+
+            # Same bytes as a stored document → reuse its text, skip parsing
+            if document_store:
+                stored_text = document_store.text_for_hash(
+                    dl.content_hash, _extractor_name(kind, query)
+                )
+                if stored_text is not None:
+                    _store_document(dl, stored_text)
+                    if dl.pdf_path:
+                        os.remove(dl.pdf_path)
+                    document_store.count(hit=True)
+                    return done(_Download(
+                        url, "cached", text=stored_text, extractor=_extractor_name(kind, query)
+                    ))
+                document_store.count(hit=False)
+
+            return done(dl)
 
     except Exception as e:
         print(f"[fetch_all] Error scraping {url}: {repr(e)}")
+        _get_scheduler().record(url, 0, time.perf_counter() - started)
+        return done(_Download(url, "error", text=_unreadable()))
+
+
+def _store_document(dl: _Download, text: str) -> None:
+    """Save a successfully parsed download in the document store."""
+    if not document_store or dl.kind not in ("pdf", "html"):
+        return
+    document_store.store(
+        url=dl.url,
+        content_hash=dl.content_hash,
+        kind=dl.kind,
+        extractor=_extractor_name(dl.kind, dl.query),
+        text=text,
+        etag=dl.etag,
+        last_modified=dl.last_modified,
+        raw=dl.raw if dl.kind == "html" else None,
+        raw_path=dl.pdf_path or None,
+    )
+
+
+def _extract_document(kind: str, payload: str) -> Tuple[str, float, bool]:
+    """
+    CPU half of a fetch: parse a downloaded PDF (temp-file path) or HTML string.
+    Runs in a worker process; returns (text, seconds spent parsing, success).
+    """
+    started = time.perf_counter()
+    ok = True
+    try:
+        if kind == "pdf":
+            text = _extract_pdf_text(payload)
+        else:
+            text = _extract_html_text(payload)
+    except Exception as e:
+        print(f"[fetch_all] Error extracting {kind} content: {repr(e)}")
+        ok = False
+        text = _unreadable()
+    return text, time.perf_counter() - started, ok
+
+
+def _parse_job(dl: _Download, io_pool: Optional[Executor], cpu_pool: Optional[Executor]):
+    """
+    Start parsing a download: on `cpu_pool` (a Future), or inline when no pools
+    are given. Relevant-page PDF extraction is coordinated from an I/O thread
+    so that its scan and page chunks can all use the process pool; without
+    one (cpu_pool is io_pool) they run inline on that thread, since waiting
+    on the I/O pool from one of its own threads can deadlock.
+    """
+    if dl.kind == "pdf" and PDF_PAGE_SELECTION == "relevant":
+        workers = max(1, SCRAPE_CPU_WORKERS)
+        if io_pool is None:
+            return _Done(_extract_pdf_relevant(dl.pdf_path, dl.query))
+        pool = cpu_pool if cpu_pool is not io_pool else None
+        return io_pool.submit(_extract_pdf_relevant, dl.pdf_path, dl.query, pool, workers)
+
+    payload = dl.pdf_path if dl.kind == "pdf" else dl.html
+    if cpu_pool is None:
+        return _Done(_extract_document(dl.kind, payload))
+    return cpu_pool.submit(_extract_document, dl.kind, payload)
+
+
+def _fetch_url_text(url: str, query: str = "") -> str:
+    """
+    Fetch and extract text from a URL (serial: download, then parse).
+    - If PDF: use pdfplumber (pages picked per PDF_PAGE_SELECTION, using `query`)
+    - Else: treat as HTML
+    On any error (403, timeout, etc.), return a clear placeholder string.
+    """
+    dl = _download(url, query)
+    if dl.kind in ("error", "cached", "throttled"):
+        return dl.text
+
+    try:
+        text, _, ok = _parse_job(dl, None, None).result()
+        if ok:
+            _store_document(dl, text)
+        return text
+    finally:
+        if dl.pdf_path:
+            os.remove(dl.pdf_path)
+
+
+def _get_io_pool() -> ThreadPoolExecutor:
+    global _io_pool
+    with _pool_lock:
+        if _io_pool is None:
+            _io_pool = ThreadPoolExecutor(
+                max_workers=max(1, SCRAPE_IO_WORKERS), thread_name_prefix="scrape-io"
+            )
+        return _io_pool
+
+
+def _get_scheduler() -> DomainScheduler:
+    global _scheduler
+    io_pool = _get_io_pool()
+    with _pool_lock:
+        if _scheduler is None:
+            _scheduler = DomainScheduler(
+                io_pool,
+                initial_window=SCRAPE_DOMAIN_INITIAL_WINDOW,
+                max_window=SCRAPE_DOMAIN_MAX_WINDOW,
+                target_latency=SCRAPE_DOMAIN_TARGET_LATENCY,
+            )
+        return _scheduler
+
+
+def _get_cpu_pool() -> Optional[ProcessPoolExecutor]:
+    global _cpu_pool
+    if SCRAPE_CPU_WORKERS <= 0:
+        return None
+    with _pool_lock:
+        if _cpu_pool is None:
+            # Not fork: the parent has I/O, LLM and metrics threads running
+            method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            _cpu_pool = ProcessPoolExecutor(
+                max_workers=SCRAPE_CPU_WORKERS, mp_context=multiprocessing.get_context(method)
+            )
+        return _cpu_pool
+
+
+def _discard_cpu_pool() -> None:
+    """Drop a broken process pool so the next fetch starts a fresh one."""
+    global _cpu_pool
+    with _pool_lock:
+        if _cpu_pool is not None:
+            _cpu_pool.shutdown(wait=False)
+            _cpu_pool = None
+
+
+def _placeholder_text(rec: StrategyRecord) -> Optional[str]:
+    """Text for records that have no real URL to scrape, else None."""
+    url = rec.primary_link or ""
+
+    if not url:
+        return f"No link is available for {rec.strategy_name} in {rec.country}."
+
+    # If it's one of our deterministic placeholders, be explicit
+    if "example.com" in url:
         return (
-            "No readable content could be extracted from this URL. "
-            "This is a placeholder description based on the link only."
+            f"This is a placeholder link (example.com) for "
+            f"{rec.strategy_name} in {rec.country}. "
+            "No official document could be reliably located by the search step."
         )
 
+    return None
+
+
+@dataclass
+class _FetchResult:
+    """One link's download plus its extracted text."""
+    download: _Download
+    text: str
+    ok: bool
+    parse_seconds: float = 0.0
+
 
+def _outcome(result: _FetchResult) -> FetchOutcome:
+    dl = result.download
+    if result.ok:
+        status = "cached" if dl.kind == "cached" else "ok"
+    elif dl.kind == "throttled":
+        status = "throttled"
+    elif dl.kind in ("pdf", "html"):
+        status = "parse_error"
+    elif dl.http_status >= 400:
+        status = "http_error"
+    elif dl.http_status == 0:
+        status = "network_error"
+    else:
+        status = "download_error"  # e.g. over the size limit
+    return FetchOutcome(
+        status=status,
+        url=dl.url,
+        http_status=dl.http_status or None,
+        content_type=dl.content_type,
+        nbytes=dl.nbytes,
+        extractor=dl.extractor,
+    )
+
+
+@metrics.timed_stage("scrape")
 def fetch_all(records: List[StrategyRecord]) -> List[StrategyRecord]:
     """
     For each StrategyRecord:
       - If the link is a fake example.com placeholder, explain that.
       - Otherwise, fetch the URL and extract readable text.
+      - Up to SCRAPE_SECONDARY_LINKS secondary links are fetched alongside;
+        their text replaces a failed primary, or is appended to it with
+        near-duplicate passages removed (dedupe.py). If none of them works,
+        the remaining secondary links (up to SCRAPE_FALLBACK_LINKS kept by
+        link search) are tried in a second round.
+      - `rec.fetch` records the outcome (status, HTTP code, content type,
+        bytes, extractor, attempts, the URLs whose text was merged); records
+        whose fetch failed keep a placeholder raw_text and are skipped by the
+        LLM stages.
+
+    Downloads run concurrently on an I/O thread pool, admitted per domain by an
+    adaptive scheduler (429/503 shrink that domain's window and are retried
+    after Retry-After); as each one finishes, its
+    PDF/HTML parsing is handed to a process pool (SCRAPE_CPU_WORKERS); with
+    PDF_PAGE_SELECTION=relevant, the pages of one PDF are also split across
+    that pool. Per-URL
+    download/parse timings are printed and stored in `rec.notes`.
+    Unchanged documents (304 or same content hash) reuse their stored text.
     """
-    for rec in records:
-        url = rec.primary_link or ""
+    io_pool = _get_io_pool()
+    cpu_pool: Executor = _get_cpu_pool() or io_pool
 
-        if not url:
-            rec.raw_text = (
-                f"No link is available for {rec.strategy_name} in {rec.country}."
+    scheduler = _get_scheduler()
+
+    # (record index, link position) -> URL; position 0 is the primary link
+    links: Dict[Tuple[int, int], str] = {}
+    attempts: Dict[Tuple[int, int], int] = {}
+    # Per record, links held back for a second round if the first finds nothing
+    spare: Dict[int, List[str]] = {}
+
+    def submit_download(key: Tuple[int, int]) -> Future:
+        rec = records[key[0]]
+        query = f"{rec.strategy_name} {rec.country}"
+        return scheduler.submit(links[key], _download, links[key], query)
+
+    def run_round(keys: List[Tuple[int, int]]) -> Dict[Tuple[int, int], _FetchResult]:
+        # Hand each download to the parser pool as soon as it lands; throttled
+        # ones go back into their domain's queue (which waits out Retry-After).
+        pending: Dict[Future, Tuple[Tuple[int, int], int]] = {
+            submit_download(key): (key, 0) for key in keys
+        }
+        downloads: Dict[Tuple[int, int], _Download] = {}
+        parse_jobs: Dict[Tuple[int, int], Future] = {}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                key, attempt = pending.pop(fut)
+                attempts[key] = attempt + 1
+                dl = fut.result()
+                if dl.kind == "throttled" and attempt < SCRAPE_THROTTLE_RETRIES:
+                    metrics.count("scrape", "retries")
+                    pending[submit_download(key)] = (key, attempt + 1)
+                    continue
+                downloads[key] = dl
+                if dl.kind in ("pdf", "html"):
+                    parse_jobs[key] = _parse_job(dl, io_pool, cpu_pool)
+
+        results: Dict[Tuple[int, int], _FetchResult] = {}
+        for key in sorted(downloads):
+            dl = downloads[key]
+            parse_seconds = 0.0
+            ok = dl.kind == "cached"
+
+            if dl.kind in ("error", "cached", "throttled"):
+                text = dl.text
+            else:
+                try:
+                    try:
+                        text, parse_seconds, ok = parse_jobs[key].result()
+                    except Exception as e:
+                        # e.g. BrokenProcessPool: lose this document, not the batch
+                        print(f"[fetch_all] Parsing {dl.url} failed: {repr(e)}")
+                        if isinstance(e, BrokenProcessPool):
+                            _discard_cpu_pool()
+                        text, ok = _unreadable(), False
+                    if ok:
+                        _store_document(dl, text)  # PDFs: while the temp file exists
+                finally:
+                    if dl.pdf_path:
+                        os.remove(dl.pdf_path)
+
+            results[key] = _FetchResult(dl, text, ok and bool(text.strip()), parse_seconds)
+            print(
+                f"[fetch_all] {dl.url}: download {dl.seconds:.2f}s, "
+                f"parse {parse_seconds:.2f}s" + (" (cached)" if dl.kind == "cached" else "")
             )
-            continue
+        return results
 
-        # If it's one of our deterministic placeholders, be explicit
-        if "example.com" in url:
-            rec.raw_text = (
-                f"This is a placeholder link (example.com) for "
-                f"{rec.strategy_name} in {rec.country}. "
-                "No official document could be reliably located by the search step."
+    first_round: List[Tuple[int, int]] = []
+    for idx, rec in enumerate(records):
+        placeholder = _placeholder_text(rec)
+        if placeholder is not None:
+            rec.raw_text = placeholder
+            rec.fetch = FetchOutcome(
+                status="placeholder" if rec.primary_link else "no_link", url=rec.primary_link
             )
             continue
 
-        # Real URL → try to scrape
-        rec.raw_text = _fetch_url_text(url)
+        # Real URLs → try to scrape (queued per domain)
+        urls = [rec.primary_link] + [
+            u for u in dict.fromkeys(rec.secondary_links)
+            if u and u != rec.primary_link and "example.com" not in u
+        ]
+        cut = 1 + max(0, SCRAPE_SECONDARY_LINKS)
+        for pos, url in enumerate(urls[:cut]):
+            links[(idx, pos)] = url
+            first_round.append((idx, pos))
+        spare[idx] = urls[cut:]
+
+    results = run_round(first_round)
+
+    # Another route for records that got nothing usable: their remaining links
+    second_round: List[Tuple[int, int]] = []
+    for idx, urls in spare.items():
+        if urls and not any(r.ok for key, r in results.items() if key[0] == idx):
+            start = sum(1 for key in links if key[0] == idx)
+            for pos, url in enumerate(urls, start=start):
+                links[(idx, pos)] = url
+                second_round.append((idx, pos))
+    if second_round:
+        metrics.count("scrape", "fallback_links", len(second_round))
+        results.update(run_round(second_round))
+
+    for idx in sorted(spare):
+        rec = records[idx]
+        own = [results[key] for key in sorted(results) if key[0] == idx]
+        found = [r for r in own if r.ok]
+        if len(found) > 1:
+            text, dropped = merge_texts([r.text for r in found])
+            print(
+                f"[fetch_all] {rec.country}: merged {len(found)} documents, "
+                f"{dropped} near-duplicate passages dropped"
+            )
+        else:
+            # Primary's placeholder if nothing worked
+            text = (found or own)[0].text
 
         # Trim to avoid enormous strings
-        if len(rec.raw_text) > 15000:
-            rec.raw_text = rec.raw_text[:15000]
+        rec.raw_text = text[:MAX_TEXT_CHARS]
+        rec.fetch = _outcome((found or own)[0])
+        rec.fetch.sources = len(found)
+        rec.fetch.urls = [r.download.url for r in found]
+        rec.fetch.attempts = sum(attempts[key] for key in links if key[0] == idx)
+
+        # Downloads of one record overlap; parses are counted in full
+        download_seconds = max(r.download.seconds for r in own)
+        parse_seconds = sum(r.parse_seconds for r in own)
+        rec.notes["download_seconds"] = f"{download_seconds:.2f}"
+        rec.notes["parse_seconds"] = f"{parse_seconds:.2f}"
+        metrics.record_time(rec, "download", download_seconds)
+        metrics.record_time(rec, "parse", parse_seconds)
+        if not rec.fetch.ok:
+            print(f"[fetch_all] {rec.country}: no usable text ({rec.fetch.status})")
+
+    if document_store:
+        stats = document_store.stats()
+        print(
+            f"[fetch_all] Document store: {stats['hits']} hits, "
+            f"{stats['misses']} misses"
+        )
 
     return records
@@ -1,11 +1,34 @@
-from typing import List, Optional
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional, Tuple
 from urllib.parse import urlparse
 
 import requests
 from tavily import TavilyClient
 from firecrawl import FirecrawlApp
 
-from .config import TAVILY_API_KEY, FIRECRAWL_API_KEY, SERPAPI_API_KEY
+from .config import (
+    TAVILY_API_KEY,
+    FIRECRAWL_API_KEY,
+    SERPAPI_API_KEY,
+    SEARCH_CONCURRENCY,
+    SERPAPI_MAX_CONCURRENCY,
+    TAVILY_MAX_CONCURRENCY,
+    FIRECRAWL_MAX_CONCURRENCY,
+    SEARCH_MODE,
+    SEARCH_HEDGE_DELAY,
+    SEARCH_CACHE_TTL,
+    SEARCH_CACHE_MAX_ENTRIES,
+    SEARCH_CACHE_BYPASS,
+    LINK_PROBE_ENABLED,
+    LINK_PROBE_MAX_CANDIDATES,
+    SCRAPE_SECONDARY_LINKS,
+    SCRAPE_FALLBACK_LINKS,
+)
+from . import http_client, link_probe, metrics
+from .link_probe import TRANSIENT_STATUSES, Probe
+from .cache import SQLiteCache, normalize_query
 from .models import StrategyRecord
 
 
@@ -17,12 +40,49 @@ firecrawl_app: Optional[FirecrawlApp] = (
     FirecrawlApp(api_key=FIRECRAWL_API_KEY) if FIRECRAWL_API_KEY else None
 )
 
+# HTML responses smaller than this are treated as stubs when ranking links
+MIN_HTML_BYTES = 2048
+
+# Caps on simultaneous in-flight calls per provider, shared by all search threads.
+_provider_slots = {
+    "serpapi": threading.BoundedSemaphore(max(1, SERPAPI_MAX_CONCURRENCY)),
+    "tavily": threading.BoundedSemaphore(max(1, TAVILY_MAX_CONCURRENCY)),
+    "firecrawl": threading.BoundedSemaphore(max(1, FIRECRAWL_MAX_CONCURRENCY)),
+}
+
+# Persistent provider-result cache, keyed by provider + normalized query.
+search_cache = SQLiteCache(
+    namespace="search",
+    ttl=SEARCH_CACHE_TTL,
+    max_entries=SEARCH_CACHE_MAX_ENTRIES,
+    bypass=SEARCH_CACHE_BYPASS,
+)
+
+
+def _cache_key(provider: str, query: str) -> str:
+    return f"{provider}:{normalize_query(query)}"
+
+
+def _cached_urls(provider: str, query: str) -> Optional[List[str]]:
+    return search_cache.get(_cache_key(provider, query))
+
+
+def _store_urls(provider: str, query: str, urls: List[str]) -> List[str]:
+    # Empty lists usually mean an error or rate limit, so don't pin them.
+    if urls:
+        search_cache.set(_cache_key(provider, query), urls)
+    return urls
+
 
 def _search_with_serpapi(query: str) -> List[str]:
     """Search using SerpAPI and return a list of URLs (best-effort)."""
     if not SERPAPI_API_KEY:
         return []
 
+    cached = _cached_urls("serpapi", query)
+    if cached is not None:
+        return cached
+
     params = {
         "engine": "google",
         "q": query,
@@ -30,8 +90,15 @@ def _search_with_serpapi(query: str) -> List[str]:
         "num": 10,
     }
 
+    started = time.perf_counter()
     try:
-        resp = requests.get("https://serpapi.com/search.json", params=params, timeout=30)
+        with _provider_slots["serpapi"]:
+            resp = http_client.get(
+                "https://serpapi.com/search.json", params=params, read_timeout=30
+            )
+        metrics.observe_http(
+            "search", resp.status_code, len(resp.content), time.perf_counter() - started
+        )
         resp.raise_for_status()
         data = resp.json()
         urls: List[str] = []
@@ -39,7 +106,12 @@ def _search_with_serpapi(query: str) -> List[str]:
             url = r.get("link")
             if url:
                 urls.append(url)
-        return urls
+        return _store_urls("serpapi", query, urls)
+    except requests.RequestException as e:
+        if e.response is None:
+            metrics.observe_http("search", 0, 0, time.perf_counter() - started)
+        print(f"[populate_links] SerpAPI error for query '{query}': {repr(e)}")
+        return []
     except Exception as e:
         print(f"[populate_links] SerpAPI error for query '{query}': {repr(e)}")
         return []
@@ -48,10 +120,21 @@ def _search_with_serpapi(query: str) -> List[str]:
 def _search_with_tavily(query: str) -> List[str]:
     if not tavily_client:
         return []
+
+    cached = _cached_urls("tavily", query)
+    if cached is not None:
+        return cached
+
+    # SDK call: counted as one request, status 200 / 0 (no byte count)
+    started = time.perf_counter()
     try:
-        res = tavily_client.search(query, max_results=8)
-        return [r["url"] for r in res.get("results", []) if r.get("url")]
+        with _provider_slots["tavily"]:
+            res = tavily_client.search(query, max_results=8)
+        metrics.observe_http("search", 200, 0, time.perf_counter() - started)
+        urls = [r["url"] for r in res.get("results", []) if r.get("url")]
+        return _store_urls("tavily", query, urls)
     except Exception as e:
+        metrics.observe_http("search", 0, 0, time.perf_counter() - started)
         print(f"[populate_links] Tavily error for query '{query}': {repr(e)}")
         return []
 
@@ -59,30 +142,157 @@ def _search_with_tavily(query: str) -> List[str]:
 def _search_with_firecrawl(query: str) -> List[str]:
     if not firecrawl_app:
         return []
+
+    cached = _cached_urls("firecrawl", query)
+    if cached is not None:
+        return cached
+
+    started = time.perf_counter()
     try:
-        res = firecrawl_app.search(query, params={"limit": 8})
-        return [r["url"] for r in res.get("data", []) if r.get("url")]
+        with _provider_slots["firecrawl"]:
+            res = firecrawl_app.search(query, params={"limit": 8})
+        metrics.observe_http("search", 200, 0, time.perf_counter() - started)
+        urls = [r["url"] for r in res.get("data", []) if r.get("url")]
+        return _store_urls("firecrawl", query, urls)
     except Exception as e:
+        metrics.observe_http("search", 0, 0, time.perf_counter() - started)
         print(f"[populate_links] Firecrawl search error for query '{query}': {repr(e)}")
         return []
 
 
-def _choose_best_url(urls: List[str]) -> Optional[str]:
-    """Prefer official / government looking domains if possible."""
-    if not urls:
-        return None
+# Providers in priority order.
+_PROVIDERS: List[Tuple[str, Callable[[str], List[str]]]] = [
+    ("serpapi", _search_with_serpapi),
+    ("tavily", _search_with_tavily),
+    ("firecrawl", _search_with_firecrawl),
+]
+
+
+def _search_fallback(query: str) -> List[str]:
+    """Sequential fallback: each provider only runs if the previous found nothing."""
+    for _, search in _PROVIDERS:
+        urls = search(query)
+        if urls:
+            return urls
+    return []
+
+
+def _search_hedged(query: str) -> List[str]:
+    """
+    Start the primary provider and launch the next one whenever the hedge delay
+    passes without a result, or as soon as a provider comes back empty.
+    The first non-empty result set wins; calls still in flight are abandoned
+    (their results are ignored) and providers not yet launched never start.
+    """
+    pool = ThreadPoolExecutor(max_workers=len(_PROVIDERS))
+    order: Dict = {}
+    pending = set()
+    next_idx = 0
+
+    def launch() -> None:
+        nonlocal next_idx
+        fut = pool.submit(_PROVIDERS[next_idx][1], query)
+        order[fut] = next_idx
+        pending.add(fut)
+        next_idx += 1
+
+    try:
+        launch()
+        while pending:
+            more_to_launch = next_idx < len(_PROVIDERS)
+            done, _ = wait(
+                pending,
+                timeout=max(0.0, SEARCH_HEDGE_DELAY) if more_to_launch else None,
+                return_when=FIRST_COMPLETED,
+            )
+            # Prefer the higher-priority provider if several finished together
+            for fut in sorted(done, key=order.get):
+                pending.discard(fut)
+                urls = fut.result()
+                if urls:
+                    return urls
+            if more_to_launch:
+                launch()
+        return []
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _normalize_url(url: str) -> str:
+    return url.split("#", 1)[0].rstrip("/")
+
+
+def _search_merged(query: str, k: int = 60) -> List[str]:
+    """
+    Query all providers in parallel and fuse their rankings with reciprocal
+    rank fusion, so URLs returned high up by several providers come first.
+    """
+    with ThreadPoolExecutor(max_workers=len(_PROVIDERS)) as pool:
+        result_lists = list(pool.map(lambda p: p[1](query), _PROVIDERS))
+
+    scores: Dict[str, float] = {}
+    first_seen: Dict[str, str] = {}
+    for urls in result_lists:
+        for rank, url in enumerate(urls):
+            key = _normalize_url(url)
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank + 1)
+            first_seen.setdefault(key, url)
+
+    ranked = sorted(scores, key=lambda key: scores[key], reverse=True)
+    return [first_seen[key] for key in ranked]
+
+
+def _search(query: str) -> List[str]:
+    if SEARCH_MODE == "hedged":
+        return _search_hedged(query)
+    if SEARCH_MODE == "merge":
+        return _search_merged(query)
+    return _search_fallback(query)
+
+
+def _domain_score(url: str) -> int:
+    host = urlparse(url).netloc.lower()
+    s = 0
+    # Prefer government / official domains
+    if any(x in host for x in ["gov", "gouv", ".gc.ca", ".go.jp", ".go.kr"]):
+        s += 2
+    if "transport" in host or "mobility" in host or "infrastructure" in host:
+        s += 1
+    return s
+
+
+def _probe_score(probe: Probe) -> int:
+    """Dead links and login walls sink; reachable PDFs rise."""
+    if probe.login_wall:
+        return -6
+    if not probe.alive:
+        return -1 if probe.status in TRANSIENT_STATUSES else -10
+    s = 3 if probe.is_pdf else 0
+    # A few KB of HTML is usually a redirect stub or viewer wrapper
+    if not probe.is_pdf and probe.size is not None and probe.size < MIN_HTML_BYTES:
+        s -= 1
+    return s
+
+
+def _rank_urls(urls: List[str], probes: Optional[Dict[str, Probe]] = None) -> List[str]:
+    """
+    Best candidates first: official / government looking domains, plus probe
+    results when available. Ties keep the search engine's order.
+    """
+    probes = probes or {}
 
     def score(url: str) -> int:
-        host = urlparse(url).netloc.lower()
-        s = 0
-        # Prefer government / official domains
-        if any(x in host for x in ["gov", "gouv", ".gc.ca", ".go.jp", ".go.kr"]):
-            s += 2
-        if "transport" in host or "mobility" in host or "infrastructure" in host:
-            s += 1
-        return s
+        probe = probes.get(url)
+        return _domain_score(url) + (_probe_score(probe) if probe else 0)
 
-    return sorted(urls, key=score, reverse=True)[0]
+    return sorted(urls, key=score, reverse=True)
+
+
+def _usable(url: str, probes: Dict[str, Probe]) -> bool:
+    probe = probes.get(url)
+    return probe is None or not probe.login_wall and (
+        probe.alive or probe.status in TRANSIENT_STATUSES
+    )
 
 
 def _fallback_placeholder(rec: StrategyRecord) -> str:
@@ -92,48 +302,76 @@ def _fallback_placeholder(rec: StrategyRecord) -> str:
     return f"https://example.com/{slug_country}/{slug_strategy}"
 
 
+def _build_query(rec: StrategyRecord) -> str:
+    return (
+        f'"{rec.strategy_name}" {rec.country} '
+        f"national transport OR mobility strategy official document"
+    )
+
+
+def find_links(rec: StrategyRecord) -> StrategyRecord:
+    """Resolve primary and secondary links for a single record (in place)."""
+    started = time.perf_counter()
+    query = _build_query(rec)
+
+    # 1) Search providers (SerpAPI → Tavily → Firecrawl, per SEARCH_MODE)
+    all_candidates: List[str] = _search(query)
+
+    # 2) Probe the top candidates in parallel (status, type, size)
+    probes: Dict[str, Probe] = {}
+    if all_candidates and LINK_PROBE_ENABLED:
+        probes = link_probe.probe_all(all_candidates[:LINK_PROBE_MAX_CANDIDATES])
+
+    # 3) Choose best + secondaries, or placeholder
+    if all_candidates:
+        ranked = _rank_urls(all_candidates, probes)
+        best = ranked[0]
+        rec.primary_link = best
+        # Fetched alongside the primary, then held back as fallbacks (scrape.py)
+        rec.secondary_links = [
+            u for u in ranked[1:] if _usable(u, probes)
+        ][:max(0, SCRAPE_SECONDARY_LINKS) + max(0, SCRAPE_FALLBACK_LINKS)]
+        if best in probes:
+            rec.notes["primary_link_probe"] = probes[best].describe()
+    else:
+        rec.primary_link = _fallback_placeholder(rec)
+        rec.secondary_links = []
+
+    metrics.record_time(rec, "search", time.perf_counter() - started)
+    return rec
+
+
+@metrics.timed_stage("search")
 def populate_links(records: List[StrategyRecord]) -> List[StrategyRecord]:
     """
     For each (country, strategy) record:
     - Use SerpAPI to search for the official or authoritative URL
-    - Fall back to Tavily, then Firecrawl search
+    - Fall back to Tavily, then Firecrawl search (or race / merge them, see SEARCH_MODE)
+    - Probe the top candidates (HEAD / Range GET, see link_probe.py) and rank
+      live PDFs on official domains first, dead links and login walls last
     - If all fail, use a deterministic placeholder URL
-    """
-
-    for rec in records:
-        query = (
-            f'"{rec.strategy_name}" {rec.country} '
-            f"national transport OR mobility strategy official document"
-        )
-
-        all_candidates: List[str] = []
-
-        # 1) SerpAPI (primary)
-        all_candidates.extend(_search_with_serpapi(query))
 
-        # 2) Tavily (fallback)
-        if not all_candidates:
-            all_candidates.extend(_search_with_tavily(query))
-
-        # 3) Firecrawl search (fallback)
-        if not all_candidates:
-            all_candidates.extend(_search_with_firecrawl(query))
+    Records are searched concurrently (up to SEARCH_CONCURRENCY at a time, with
+    per-provider limits); results keep the input order.
+    """
+    if not records:
+        return records
 
-        # 4) Choose best + secondaries, or placeholder
-        if all_candidates:
-            best = _choose_best_url(all_candidates) or all_candidates[0]
-            rec.primary_link = best
-            rec.secondary_links = [
-                u for u in all_candidates if u != best
-            ][:3]  # up to 3 secondaries
-        else:
-            rec.primary_link = _fallback_placeholder(rec)
-            rec.secondary_links = []
+    workers = max(1, min(SEARCH_CONCURRENCY, len(records)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        records = list(pool.map(find_links, records))
 
-        # Helpful for CLI logging
+    # Helpful for CLI logging
+    for rec in records:
         print(
             f"[populate_links] {rec.country}: "
             f"{rec.strategy_name} -> {rec.primary_link}"
         )
 
+    stats = search_cache.stats()
+    print(
+        f"[populate_links] Search cache: {stats['hits']} hits, "
+        f"{stats['misses']} misses"
+    )
+
     return records
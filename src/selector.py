@@ -1,11 +1,15 @@
-from typing import List
-from openai import OpenAI
+import math
+import re
+import unicodedata
+from difflib import SequenceMatcher
+from itertools import zip_longest
+from typing import List, Optional
 
-from .config import OPENAI_API_KEY
+from .config import SELECTOR_MAX_COUNTRIES, SELECTOR_SHARD_SIZE, SELECTOR_DEDUPE_SIMILARITY
+from . import metrics
+from .llm import LLMRequest, complete, run_all
 from .models import StrategyRecord
 
-client = OpenAI(api_key=OPENAI_API_KEY)
-
 PROMPT_TEMPLATE = """
 You are a policy research assistant.
 
@@ -13,7 +17,7 @@ Research focus:
 {research_focus}
 
 Task:
-1. Propose a list of up to 10 countries that are relevant for this research focus.
+1. Propose a list of up to {max_countries} countries that are relevant for this research focus.
 2. For each country, provide the official or commonly used name of the main national strategy,
    plan, or policy that matches this topic.
 3. If you are not sure of the exact official name, create a short descriptive title that a
@@ -29,39 +33,228 @@ Germany | National Sustainable Mobility Strategy
 Japan | Next-Generation Mobility Strategy
 """
 
+# Sharded mode: one prompt per region (or per slice of an explicit country list)
+REGIONS = [
+    "Western Europe",
+    "Northern Europe",
+    "Southern Europe",
+    "Eastern Europe and Central Asia",
+    "North America",
+    "Latin America and the Caribbean",
+    "Middle East and North Africa",
+    "Sub-Saharan Africa",
+    "South Asia",
+    "East Asia",
+    "Southeast Asia and Oceania",
+]
 
-def generate_strategies(research_focus: str) -> List[StrategyRecord]:
-    
-    if not research_focus:
-        research_focus = "National transport and mobility strategies of major economies."
+SHARD_SCOPE_REGION = "Only propose countries located in: {region}."
+SHARD_SCOPE_COUNTRIES = "Only use these countries, one line each: {countries}."
 
-    try:
-        prompt = PROMPT_TEMPLATE.format(research_focus=research_focus)
+COUNTRY_ALIASES = {
+    "us": "united states",
+    "usa": "united states",
+    "united states of america": "united states",
+    "uk": "united kingdom",
+    "great britain": "united kingdom",
+    "republic of korea": "south korea",
+    "russian federation": "russia",
+    "turkiye": "turkey",
+    "czechia": "czech republic",
+    "uae": "united arab emirates",
+    "peoples republic of china": "china",
+    "prc": "china",
+}
+
+# Words that do not tell two strategy names apart
+NAME_STOPWORDS = {"the", "of", "and", "for", "on", "in", "to", "a", "an"}
+
+INSTRUCTIONS = "Generate country and strategy pairs as specified."
+
+
+def _normalize(name: str) -> str:
+    """Lowercase, accents stripped; non-Latin letters are kept."""
+    text = "".join(
+        c for c in unicodedata.normalize("NFKD", name) if not unicodedata.combining(c)
+    ).lower()
+    text = re.sub(r"[^\w\s]", " ", text)
+    text = re.sub(r"^the\s+", "", " ".join(text.split()))
+    return text
+
+
+def _country_key(country: str) -> str:
+    key = _normalize(country)
+    return COUNTRY_ALIASES.get(key, key)
+
+
+def _name_tokens(name: str) -> List[str]:
+    return [t for t in _normalize(name).split() if t not in NAME_STOPWORDS]
+
+
+def _same_token(a: str, b: str) -> bool:
+    """Equal, or a typo apart (SELECTOR_DEDUPE_SIMILARITY); numbers must be equal."""
+    if a == b:
+        return True
+    if a.isdigit() or b.isdigit():
+        return False
+    return SequenceMatcher(None, a, b).ratio() >= SELECTOR_DEDUPE_SIMILARITY
+
+
+def _same_strategy(a: str, b: str) -> bool:
+    """
+    Names with the same content words and years, in any order, allowing typos
+    within a word. "National Rail Strategy" / "National Road Strategy" and
+    "Rail Plan" / "Rail Plan 2040" are different strategies.
+    """
+    a_tokens, b_tokens = _name_tokens(a), _name_tokens(b)
+    if not a_tokens or len(a_tokens) != len(b_tokens):
+        return False
+    unmatched = list(b_tokens)
+    for token in a_tokens:
+        match = next((t for t in unmatched if _same_token(token, t)), None)
+        if match is None:
+            return False
+        unmatched.remove(match)
+    return True
+
+
+def dedupe_strategies(records: List[StrategyRecord]) -> List[StrategyRecord]:
+    """Drop repeated country/strategy pairs (normalized, fuzzy), keeping the first."""
+    kept: List[StrategyRecord] = []
+    seen = {}  # country key -> strategy names kept
+    for rec in records:
+        names = seen.setdefault(_country_key(rec.country), [])
+        if any(_same_strategy(rec.strategy_name, name) for name in names):
+            continue
+        names.append(rec.strategy_name)
+        kept.append(rec)
+    return kept
 
-        response = client.responses.create(
-            model="gpt-4.1-mini",
-            instructions="Generate country and strategy pairs as specified.",
-            input=prompt,
+
+def _parse_records(output_text: str) -> List[StrategyRecord]:
+    """StrategyRecords from "Country | Strategy" lines."""
+    raw_text = (output_text or "").strip()
+    lines = [ln.strip() for ln in raw_text.splitlines() if ln.strip()]
+
+    records: List[StrategyRecord] = []
+    for line in lines:
+        # Expect "Country | Strategy"
+        if "|" not in line:
+            continue
+        country_part, strategy_part = line.split("|", 1)
+        country = country_part.strip()
+        strategy_name = strategy_part.strip()
+        if country and strategy_name:
+            records.append(
+                StrategyRecord(
+                    country=country,
+                    strategy_name=strategy_name,
+                )
+            )
+    return records
+
+
+def _shard_requests(
+    research_focus: str, max_countries: int, countries: Optional[List[str]]
+) -> List[LLMRequest]:
+    if countries:
+        shards = [
+            (len(chunk), SHARD_SCOPE_COUNTRIES.format(countries=", ".join(chunk)))
+            for chunk in (
+                countries[i:i + SELECTOR_SHARD_SIZE]
+                for i in range(0, len(countries), SELECTOR_SHARD_SIZE)
+            )
+        ]
+    else:
+        per_region = math.ceil(max_countries / len(REGIONS))
+        shards = [(per_region, SHARD_SCOPE_REGION.format(region=region)) for region in REGIONS]
+
+    return [
+        LLMRequest(
+            stage="selector",
+            instructions=INSTRUCTIONS,
+            prompt=PROMPT_TEMPLATE.format(research_focus=research_focus, max_countries=n)
+            + "\n" + scope,
         )
+        for n, scope in shards
+    ]
+
+
+def _generate_sharded(
+    research_focus: str, max_countries: int, countries: Optional[List[str]]
+) -> List[StrategyRecord]:
+    """
+    Run one prompt per shard in parallel (shared LLM executor), merge and
+    dedupe. Without an explicit country list, regions are interleaved so the
+    `max_countries` cap keeps every region represented.
+    """
+    requests = _shard_requests(research_focus, max_countries, countries)
+    shards: List[List[StrategyRecord]] = []
+    for result in run_all(requests):
+        if result.error is not None:
+            print(f"[generate_strategies] Shard failed: {repr(result.error)}")
+            continue
+        shards.append(_parse_records(result.text))
 
-        raw_text = (response.output_text or "").strip()
-        lines = [ln.strip() for ln in raw_text.splitlines() if ln.strip()]
+    if countries:
+        return dedupe_strategies([rec for shard in shards for rec in shard])
 
-        records: List[StrategyRecord] = []
-        for line in lines:
-            # Expect "Country | Strategy"
-            if "|" not in line:
+    position = {id(rec): (s, i) for s, shard in enumerate(shards) for i, rec in enumerate(shard)}
+    interleaved = [rec for group in zip_longest(*shards) for rec in group if rec is not None]
+
+    chosen: List[StrategyRecord] = []
+    kept_countries = set()
+    for rec in dedupe_strategies(interleaved):
+        key = _country_key(rec.country)
+        if key not in kept_countries:
+            if len(kept_countries) >= max_countries:
                 continue
-            country_part, strategy_part = line.split("|", 1)
-            country = country_part.strip()
-            strategy_name = strategy_part.strip()
-            if country and strategy_name:
-                records.append(
-                    StrategyRecord(
-                        country=country,
-                        strategy_name=strategy_name,
-                    )
+            kept_countries.add(key)
+        chosen.append(rec)
+    # Back in shard (region) order
+    return sorted(chosen, key=lambda rec: position[id(rec)])
+
+
+@metrics.timed_stage("selector")
+def generate_strategies(
+    research_focus: str,
+    max_countries: int = SELECTOR_MAX_COUNTRIES,
+    countries: Optional[List[str]] = None,
+) -> List[StrategyRecord]:
+    """
+    Ask the model for country / strategy pairs matching the research focus.
+
+    Up to SELECTOR_SHARD_SIZE countries are generated in one prompt. Larger
+    requests (`max_countries` above the shard size, or an explicit
+    `countries` list longer than it) are split into parallel prompts by
+    region or by slices of the country list, then merged with duplicate
+    country/strategy pairs removed.
+    """
+    if not research_focus:
+        research_focus = "National transport and mobility strategies of major economies."
+
+    try:
+        sharded = (len(countries) if countries else max_countries) > SELECTOR_SHARD_SIZE
+        if sharded:
+            records = _generate_sharded(research_focus, max_countries, countries)
+        else:
+            prompt = PROMPT_TEMPLATE.format(
+                research_focus=research_focus,
+                max_countries=len(countries) if countries else max_countries,
+            )
+            if countries:
+                prompt += "\n" + SHARD_SCOPE_COUNTRIES.format(countries=", ".join(countries))
+
+            result = complete(
+                LLMRequest(
+                    stage="selector",
+                    instructions=INSTRUCTIONS,
+                    prompt=prompt,
                 )
+            )
+            if result.error is not None:
+                raise result.error
+            records = dedupe_strategies(_parse_records(result.text))
 
         if not records:
             raise ValueError("No valid strategies parsed from model output.")
@@ -1,11 +1,24 @@
-from typing import List
+import json
+import re
+from typing import Callable, Dict, List, Optional
 
-from openai import OpenAI
-from .config import OPENAI_API_KEY
+from . import metrics
+from .context import pack_context
+from .llm import LLMRequest, iter_cascade
 from .models import StrategyRecord, SummarySentence
+from .verify import check_quotes, skip_unfetched
 
+RecordCallback = Callable[[StrategyRecord], None]
+SentenceCallback = Callable[[StrategyRecord, str], None]
 
-client = OpenAI(api_key=OPENAI_API_KEY)
+
+SUMMARY_INSTRUCTIONS = (
+    "Produce 3–5 strictly factual sentences, one per line, "
+    "grounded only in the provided text."
+)
+
+# Added to the context query so the objectives / priorities sections rank high
+SUMMARY_QUERY_TERMS = "objectives goals vision priorities targets measures programmes implementation"
 
 SUMMARY_PROMPT_TEMPLATE = """
 You are a neutral policy research assistant.
@@ -29,52 +42,265 @@ Here is the extracted text:
 \"\"\"{text}\"\"\"
 """
 
+FUSED_INSTRUCTIONS = (
+    "Produce 3–5 strictly factual summary sentences grounded only in the "
+    "provided text, each with a verbatim supporting quote and a status, "
+    "as JSON exactly as specified."
+)
+
+FUSED_PROMPT_TEMPLATE = """
+You are a neutral policy research assistant and a strict fact-checker.
+
+Country: {country}
+Strategy name: {strategy_name}
+
+You are given extracted text from this strategy.
+
+Task:
+1. Write a concise, factual summary of this strategy in 3–5 sentences.
+2. Focus ONLY on what is clearly stated in the text: objectives, priority areas,
+   key programs, and implementation focus.
+3. Do NOT interpret, predict, critique, or add extra information.
+4. For each sentence, copy the passage of the text that supports it, word for
+   word (one or two sentences, no ellipses), as "supporting_quote".
+5. For each sentence, give "status":
+   - "Verified"           → fully supported by the quote
+   - "Partially verified" → some parts supported, some unclear
+   - "Not verified"       → not supported by the text
+   Do NOT be generous.
+
+Output format: ONLY this JSON, no code fences or commentary:
+{{"sentences": [{{"sentence": "...", "supporting_quote": "...", "status": "Verified"}}]}}
+
+Here is the extracted text:
+
+\"\"\"{text}\"\"\"
+"""
+
+
+def _context_query(rec: StrategyRecord, research_focus: str) -> str:
+    return f"{rec.strategy_name} {rec.country} {research_focus} {SUMMARY_QUERY_TERMS}"
+
+
+def _summary_request(rec: StrategyRecord, research_focus: str = "") -> LLMRequest:
+    prompt = SUMMARY_PROMPT_TEMPLATE.format(
+        country=rec.country,
+        strategy_name=rec.strategy_name,
+        text=pack_context(rec.raw_text, _context_query(rec, research_focus)),
+    )
+    return LLMRequest(stage="summarize", instructions=SUMMARY_INSTRUCTIONS, prompt=prompt)
+
+
+def _usable_summary(output_text: str) -> bool:
+    """At least three sentence lines; otherwise a stronger model is asked."""
+    return len([ln for ln in (output_text or "").splitlines() if ln.strip()]) >= 3
+
+
+def _apply_summary(rec: StrategyRecord, output_text: str) -> None:
+    """Parse the model output into SummarySentence objects (raises if empty)."""
+    raw = (output_text or "").strip()
+    lines = [ln.strip() for ln in raw.splitlines() if ln.strip()]
+
+    sentences = [
+        SummarySentence(sentence=line)
+        for line in lines
+    ]
+
+    if not sentences:
+        raise ValueError("No sentences generated")
+
+    rec.summary_sentences = sentences
+
+
+def _apply_summary_fallback(rec: StrategyRecord, error: Exception) -> None:
+    print(f"[summarize_all] Error summarizing {rec.country}: {repr(error)}")
+    fallback = (
+        f"{rec.country}'s \"{rec.strategy_name}\" focuses on "
+        f"transport and mobility policy."
+    )
+    rec.summary_sentences = [SummarySentence(sentence=fallback)]
+
 
-def summarize_all(records: List[StrategyRecord]) -> List[StrategyRecord]:
+def _fused_request(rec: StrategyRecord, research_focus: str = "") -> LLMRequest:
+    prompt = FUSED_PROMPT_TEMPLATE.format(
+        country=rec.country,
+        strategy_name=rec.strategy_name,
+        text=pack_context(rec.raw_text, _context_query(rec, research_focus)),
+    )
+    return LLMRequest(stage="summarize", instructions=FUSED_INSTRUCTIONS, prompt=prompt)
+
+
+def _parse_fused(output_text: str) -> List[SummarySentence]:
+    """SummarySentence objects from the fused JSON answer (raises if empty)."""
+    raw = (output_text or "").strip()
+    # Tolerate a ```json fence around the object
+    raw = re.sub(r"^```(?:json)?\s*|\s*```$", "", raw)
+    items = json.loads(raw).get("sentences") or []
+
+    sentences = [
+        SummarySentence(
+            sentence=str(item.get("sentence", "")).strip(),
+            status=item.get("status"),
+            supporting_quote=item.get("supporting_quote") or None,
+        )
+        for item in items
+        if isinstance(item, dict) and str(item.get("sentence", "")).strip()
+    ]
+
+    if not sentences:
+        raise ValueError("No sentences generated")
+    return sentences
+
+
+def _usable_fused(output_text: str) -> bool:
+    try:
+        _parse_fused(output_text)
+    except Exception:
+        return False
+    return True
+
+
+def _apply_fused(rec: StrategyRecord, output_text: str) -> None:
+    """Take the fused answer's sentences and check their quotes locally."""
+    rec.summary_sentences = _parse_fused(output_text)
+    check_quotes(rec)
+
+
+class _SentenceStream:
+    """Turns streamed text deltas into completed summary lines, per record."""
+
+    def __init__(
+        self, on_sentence: SentenceCallback, on_restart: Optional[RecordCallback] = None
+    ) -> None:
+        self.on_sentence = on_sentence
+        self.on_restart = on_restart
+        self.buffers: Dict[int, str] = {}
+        self.emitted: Dict[int, int] = {}
+
+    def _emit(self, idx: int, rec: StrategyRecord, lines: List[str]) -> None:
+        for line in lines:
+            if line.strip():
+                self.on_sentence(rec, line.strip())
+                self.emitted[idx] = self.emitted.get(idx, 0) + 1
+
+    def delta(self, idx: int, rec: StrategyRecord, text: str) -> None:
+        *lines, self.buffers[idx] = (self.buffers.get(idx, "") + text).split("\n")
+        self._emit(idx, rec, lines)
+
+    def restart(self, idx: int, rec: StrategyRecord) -> None:
+        """Void the record's streamed text; retract lines already passed on."""
+        self.buffers.pop(idx, None)
+        if self.emitted.pop(idx, 0) and self.on_restart:
+            self.on_restart(rec)
+
+    def finish(self, idx: int, rec: StrategyRecord, text: str) -> None:
+        """Emit whatever the deltas did not cover (the last line, cached answers)."""
+        self.buffers.pop(idx, None)
+        lines = [ln for ln in (text or "").splitlines() if ln.strip()]
+        self._emit(idx, rec, lines[self.emitted.get(idx, 0):])
+
+
+@metrics.timed_stage("summarize_verify")
+def summarize_and_verify_all(
+    records: List[StrategyRecord],
+    research_focus: str = "",
+    on_record: Optional[RecordCallback] = None,
+) -> List[StrategyRecord]:
     """
-    Use GPT-4.1-mini to create 3–5 factual sentences per strategy
-    based on the scraped raw_text. Falls back to a simple template
-    if anything goes wrong.
+    Fused alternative to summarize_all + verify_all (SUMMARY_MODE=fused): one
+    call per strategy returns each summary sentence with a supporting quote
+    and a self-assessed status, and a local quote check (verify.check_quotes)
+    replaces the second LLM pass. Fills the same SummarySentence fields.
+    `on_record(rec)` is called as soon as each record is done. Records whose
+    fetch failed get a "Not verified" note without an LLM call.
     """
-    for rec in records:
-        if not rec.raw_text:
-            continue
+    todo = [rec for rec in skip_unfetched(records, "summarize_verify", on_record) if rec.raw_text]
+    events = iter_cascade(
+        [_fused_request(rec, research_focus) for rec in todo],
+        lambda i, result: _usable_fused(result.text),
+    )
 
+    for event in events:
+        if event.result is None:
+            continue
+        rec, result = todo[event.index], event.result
+        metrics.record_time(rec, "summarize_verify", result.latency)
         try:
-            prompt = SUMMARY_PROMPT_TEMPLATE.format(
-                country=rec.country,
-                strategy_name=rec.strategy_name,
-                text=rec.raw_text[:8000],  # safety truncation
-            )
-
-            response = client.responses.create(
-                model="gpt-4.1-mini",
-                instructions=(
-                    "Produce 3–5 strictly factual sentences, one per line, "
-                    "grounded only in the provided text."
-                ),
-                input=prompt,
-            )
-
-            raw = (response.output_text or "").strip()
-            lines = [ln.strip() for ln in raw.splitlines() if ln.strip()]
-
-            sentences = [
-                SummarySentence(sentence=line)
-                for line in lines
-            ]
-
-            if not sentences:
-                raise ValueError("No sentences generated")
-
-            rec.summary_sentences = sentences
+            if result.error is not None:
+                raise result.error
+            _apply_fused(rec, result.text)
+        except Exception as e:
+            _apply_summary_fallback(rec, e)
+            for s in rec.summary_sentences:
+                s.status = "Partially verified"
+        if on_record:
+            on_record(rec)
+
+    return records
+
+
+@metrics.timed_stage("summarize")
+def summarize_all(
+    records: List[StrategyRecord],
+    research_focus: str = "",
+    on_sentence: Optional[SentenceCallback] = None,
+    on_record: Optional[RecordCallback] = None,
+    on_restart: Optional[RecordCallback] = None,
+) -> List[StrategyRecord]:
+    """
+    Have the LLM (LLM_MODEL_TIERS, cheapest first; LLM_MODEL by default)
+    create 3–5 factual sentences per strategy based on the scraped raw_text.
+    Falls back to a simple template if anything goes wrong.
+
+    The prompt carries the raw_text passages most relevant to the strategy
+    and `research_focus`, packed into a token budget (see context.py).
 
+    All records are sent through the shared LLM executor at once
+    (bounded concurrency + rate limits), or as one Batch API job when
+    LLM_MODE=batch. With several LLM_MODEL_TIERS, answers with fewer than
+    three sentences are retried one tier up.
+
+    Progress is reported on the calling thread as it happens: with
+    `on_sentence(rec, sentence)` answers are streamed and each sentence is
+    passed on as soon as it is complete; `on_record(rec)` is called once a
+    record's summary is final. Streamed sentences are a preview; the record
+    passed to `on_record` is authoritative. When an answer is escalated to a
+    stronger tier after sentences were streamed, `on_restart(rec)` is called
+    first: the sentences passed on so far are void and the record's preview
+    should be cleared.
+
+    Records whose fetch failed (placeholder raw_text) get a "Not verified"
+    note instead of an LLM call.
+    """
+    todo = [rec for rec in skip_unfetched(records, "summarize", on_record) if rec.raw_text]
+    stream = _SentenceStream(on_sentence, on_restart) if on_sentence else None
+    events = iter_cascade(
+        [_summary_request(rec, research_focus) for rec in todo],
+        lambda i, result: _usable_summary(result.text),
+        stream=stream is not None,
+    )
+
+    for event in events:
+        rec = todo[event.index]
+        if event.restart:
+            if stream:
+                stream.restart(event.index, rec)
+            continue
+        if event.result is None:
+            stream.delta(event.index, rec, event.delta)
+            continue
+
+        result = event.result
+        metrics.record_time(rec, "summarize", result.latency)
+        if stream and result.error is None:
+            stream.finish(event.index, rec, result.text)
+        try:
+            if result.error is not None:
+                raise result.error
+            _apply_summary(rec, result.text)
         except Exception as e:
-            print(f"[summarize_all] Error summarizing {rec.country}: {repr(e)}")
-            fallback = (
-                f"{rec.country}'s \"{rec.strategy_name}\" focuses on "
-                f"transport and mobility policy."
-            )
-            rec.summary_sentences = [SummarySentence(sentence=fallback)]
+            _apply_summary_fallback(rec, e)
+        if on_record:
+            on_record(rec)
 
     return records
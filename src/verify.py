@@ -1,11 +1,20 @@
-from typing import List
+import re
+from typing import Callable, List, Optional, Tuple
 
-from openai import OpenAI
-from .config import OPENAI_API_KEY
+from . import metrics
+from .config import VERIFY_LOCAL_MATCH, VERIFY_MATCH_THRESHOLD, VERIFY_EVIDENCE_SNIPPETS
+from .context import pack_context
+from .evidence import Evidence, EvidenceIndex, numbers_in, polarity_ok
+from .llm import LLMRequest, iter_cascade
 from .models import StrategyRecord, SummarySentence
 
 
-client = OpenAI(api_key=OPENAI_API_KEY)
+VERIFY_STATUSES = {"Verified", "Partially verified", "Not verified"}
+
+VERIFY_INSTRUCTIONS = (
+    "Fact-check each summary sentence strictly against the text and "
+    "output one STATUS line per sentence as specified."
+)
 
 VERIFY_PROMPT_TEMPLATE = """
 You are a strict fact-checking assistant.
@@ -48,58 +57,287 @@ Partially verified | funding is mentioned but no amount
 Not verified | no evidence of timeline in the text
 """
 
+EVIDENCE_PROMPT_TEMPLATE = """
+You are a strict fact-checking assistant.
+
+Country: {country}
+Strategy name: {strategy_name}
+
+Below, each summary sentence is followed by the passages of the strategy text
+that match it best.
+
+{evidence_block}
+
+Task:
+For each summary sentence, judge against ITS passages whether it is:
+
+- "Verified"          → fully supported by the passages
+- "Partially verified"→ some parts supported, some unclear
+- "Not verified"      → not supported or contradicted by the passages
+
+Rules:
+- Do NOT be generous. If the passages do not clearly support the sentence, mark
+  it as Partially verified or Not verified.
+- Ignore your prior knowledge; use ONLY the provided passages.
+
+Output format:
+Return ONLY plain text.
+Output exactly one line per sentence, in the same order, with this format:
 
-def verify_all(records: List[StrategyRecord]) -> List[StrategyRecord]:
+STATUS | very short reason
+
+Where STATUS is one of:
+- Verified
+- Partially verified
+- Not verified
+"""
+
+
+def _verify_request(rec: StrategyRecord, research_focus: str = "") -> LLMRequest:
+    sentences_block = "\n".join(
+        f"{idx+1}. {s.sentence}" for idx, s in enumerate(rec.summary_sentences)
+    )
+    # The sentences themselves are the best query for their evidence
+    query = " ".join(
+        [rec.strategy_name, rec.country, research_focus]
+        + [s.sentence for s in rec.summary_sentences]
+    )
+    prompt = VERIFY_PROMPT_TEMPLATE.format(
+        country=rec.country,
+        strategy_name=rec.strategy_name,
+        text=pack_context(rec.raw_text, query),
+        sentences_block=sentences_block,
+    )
+    return LLMRequest(stage="verify", instructions=VERIFY_INSTRUCTIONS, prompt=prompt)
+
+
+def _evidence_request(
+    rec: StrategyRecord, sentences: List[SummarySentence], evidence: List[Evidence]
+) -> LLMRequest:
+    """Verification prompt carrying only each sentence's best passages."""
+    blocks = []
+    for idx, (sent, ev) in enumerate(zip(sentences, evidence)):
+        passages = "\n".join(f'   - "{snippet}"' for snippet in ev.snippets)
+        blocks.append(
+            f"{idx+1}. {sent.sentence}\n   Passages:\n"
+            + (passages or "   (no matching passage found)")
+        )
+    prompt = EVIDENCE_PROMPT_TEMPLATE.format(
+        country=rec.country,
+        strategy_name=rec.strategy_name,
+        evidence_block="\n\n".join(blocks),
+    )
+    return LLMRequest(stage="verify", instructions=VERIFY_INSTRUCTIONS, prompt=prompt)
+
+
+def _match_locally(rec: StrategyRecord) -> List[Tuple[SummarySentence, Evidence]]:
     """
-    Use GPT-4.1-mini to assign a verification status to each summary sentence.
-    Falls back to 'Partially verified' if anything goes wrong.
+    Mark near-verbatim sentences Verified, with their passage as
+    supporting_quote. Returns (sentence, evidence) for the sentences that
+    still need the LLM.
+    """
+    index = EvidenceIndex(rec.raw_text)
+    pending = []
+    for sent in rec.summary_sentences:
+        ev = index.match(sent.sentence, top_k=VERIFY_EVIDENCE_SNIPPETS)
+        if ev.supports(VERIFY_MATCH_THRESHOLD):
+            sent.supporting_quote = ev.quote
+            sent.status = "Verified"
+        else:
+            pending.append((sent, ev))
+    return pending
+
+
+def _status_tokens(output_text: str) -> List[str]:
+    """The STATUS part (before the first '|') of each non-empty output line."""
+    raw = (output_text or "").strip()
+    return [ln.split("|", 1)[0].strip() for ln in raw.splitlines() if ln.strip()]
+
+
+def _confident(output_text: str, n_sentences: int) -> bool:
+    """
+    Whether a verification answer can be kept without asking a stronger
+    model: one valid status per sentence and none "Partially verified".
+    """
+    tokens = _status_tokens(output_text)
+    return len(tokens) >= n_sentences and all(
+        t in VERIFY_STATUSES and t != "Partially verified" for t in tokens[:n_sentences]
+    )
+
+
+def _apply_verification(
+    rec: StrategyRecord, output_text: str, sentences: Optional[List[SummarySentence]] = None
+) -> None:
+    """
+    Assign one status per summary sentence from the model's STATUS lines
+    (`sentences` defaults to all of the record's sentences).
+    """
+    if sentences is None:
+        sentences = rec.summary_sentences
+    tokens = _status_tokens(output_text)
+
+    # Match each summary sentence with a status line
+    for sent_obj, status_token in zip(sentences, tokens):
+        if status_token not in VERIFY_STATUSES:
+            status_token = "Partially verified"
+        sent_obj.status = status_token
+
+    # For any leftover sentences (if model returned fewer lines), set default
+    for sent_obj in sentences[len(tokens):]:
+        if not sent_obj.status:
+            sent_obj.status = "Partially verified"
+
+
+def _apply_verification_fallback(rec: StrategyRecord, error: Exception) -> None:
+    print(f"[verify_all] Error verifying {rec.country}: {repr(error)}")
+    # Conservative fallback: mark as partially verified
+    for s in rec.summary_sentences:
+        if not s.status:
+            s.status = "Partially verified"
+
+
+def skip_unfetched(
+    records: List[StrategyRecord],
+    stage: str,
+    on_record: Optional[Callable[[StrategyRecord], None]] = None,
+) -> List[StrategyRecord]:
+    """
+    Records worth an LLM call at `stage`. Records whose fetch failed (see
+    StrategyRecord.fetch) only have placeholder text: they get a single
+    "Not verified" note instead of a summary, are reported through
+    `on_record`, and are counted as skipped calls.
     """
+    todo = []
+    skipped = 0
     for rec in records:
-        if not rec.raw_text or not rec.summary_sentences:
+        if not rec.fetch_failed:
+            todo.append(rec)
             continue
+        skipped += 1
+        if not rec.summary_sentences:
+            rec.summary_sentences = [SummarySentence(
+                sentence=f"No summary: the source document could not be retrieved "
+                         f"({rec.fetch.status}).",
+                status="Not verified",
+            )]
+        if on_record:
+            on_record(rec)
+    if skipped:
+        metrics.count(stage, "llm_skipped", skipped)
+        print(f"[{stage}] Skipped {skipped} records without retrievable source text")
+    return todo
 
-        sentences_block = "\n".join(
-            f"{idx+1}. {s.sentence}" for idx, s in enumerate(rec.summary_sentences)
+
+def _normalize(text: str) -> str:
+    text = text.lower().translate(str.maketrans("‘’“”–—", "''\"\"--"))
+    return " ".join(re.findall(r"\w+|[^\w\s]", text))
+
+
+def check_quotes(rec: StrategyRecord) -> None:
+    """
+    Deterministic check of model-supplied statuses and supporting quotes
+    (fused summarize-and-verify mode), replacing a second LLM pass:
+    - a quote found verbatim in raw_text keeps the model's status, except that
+      "Verified" needs every number in the sentence to appear in the quote;
+    - otherwise the sentence is matched locally (evidence.py): a strong match
+      is Verified with the local passage as quote, no match at all is
+      "Not verified", anything else is at best "Partially verified".
+    """
+    source = _normalize(rec.raw_text or "")
+    index = None
+    for sent in rec.summary_sentences:
+        status = sent.status if sent.status in VERIFY_STATUSES else "Partially verified"
+        quote = (sent.supporting_quote or "").strip().strip('"')
+        if quote and _normalize(quote) in source:
+            sent.supporting_quote = quote
+            if status == "Verified" and not (
+                numbers_in(sent.sentence) <= numbers_in(quote)
+                and polarity_ok(sent.sentence, quote)
+            ):
+                status = "Partially verified"
+        else:
+            if index is None:
+                index = EvidenceIndex(rec.raw_text)
+            ev = index.match(sent.sentence, top_k=1)
+            sent.supporting_quote = ev.quote if ev.supports(VERIFY_MATCH_THRESHOLD) else None
+            if sent.supporting_quote:
+                status = "Verified"
+            elif not ev.quote:
+                status = "Not verified"
+            elif status == "Verified":
+                status = "Partially verified"
+        sent.status = status
+
+
+@metrics.timed_stage("verify")
+def verify_all(
+    records: List[StrategyRecord],
+    research_focus: str = "",
+    on_record: Optional[Callable[[StrategyRecord], None]] = None,
+) -> List[StrategyRecord]:
+    """
+    Have the LLM (LLM_MODEL_TIERS, cheapest first; LLM_MODEL by default)
+    assign a verification status to each summary sentence.
+    Falls back to 'Partially verified' if anything goes wrong.
+
+    With VERIFY_LOCAL_MATCH on, each sentence is first matched against
+    raw_text locally (evidence.py): near-verbatim sentences are marked
+    Verified without an API call, with their passage as `supporting_quote`,
+    and only the rest go to the model with their best passages.
+    Otherwise the prompt carries the raw_text passages that best match the
+    summary sentences, packed into a token budget (see context.py).
+
+    All records are sent through the shared LLM executor at once
+    (bounded concurrency + rate limits), or as one Batch API job when
+    LLM_MODE=batch. With several LLM_MODEL_TIERS, answers that are short of
+    lines, unparseable or "Partially verified" are re-checked one tier up.
+    `on_record(rec)` is called (on the calling thread) as soon as each
+    record's statuses are final. Records whose fetch failed are skipped.
+    """
+    todo = [
+        rec for rec in skip_unfetched(records, "verify", on_record)
+        if rec.raw_text and rec.summary_sentences
+    ]
+    jobs: List[Tuple[StrategyRecord, List[SummarySentence]]] = []
+    requests: List[LLMRequest] = []
+
+    if not VERIFY_LOCAL_MATCH:
+        for rec in todo:
+            jobs.append((rec, rec.summary_sentences))
+            requests.append(_verify_request(rec, research_focus))
+    else:
+        for rec in todo:
+            unresolved = _match_locally(rec)
+            if not unresolved:
+                if on_record:
+                    on_record(rec)
+                continue
+            sentences = [s for s, _ in unresolved]
+            jobs.append((rec, sentences))
+            requests.append(_evidence_request(rec, sentences, [ev for _, ev in unresolved]))
+
+        total = sum(len(rec.summary_sentences) for rec in todo)
+        sent_to_llm = sum(len(sentences) for _, sentences in jobs)
+        print(
+            f"[verify_all] {total - sent_to_llm}/{total} sentences verified locally, "
+            f"{sent_to_llm} sent to the LLM"
         )
 
+    events = iter_cascade(
+        requests, lambda i, result: _confident(result.text, len(jobs[i][1]))
+    )
+    for event in events:
+        if event.result is None:
+            continue
+        (rec, sentences), result = jobs[event.index], event.result
+        metrics.record_time(rec, "verify", result.latency)
         try:
-            prompt = VERIFY_PROMPT_TEMPLATE.format(
-                country=rec.country,
-                strategy_name=rec.strategy_name,
-                text=rec.raw_text[:8000],
-                sentences_block=sentences_block,
-            )
-
-            response = client.responses.create(
-                model="gpt-4.1-mini",
-                instructions=(
-                    "Fact-check each summary sentence strictly against the text and "
-                    "output one STATUS line per sentence as specified."
-                ),
-                input=prompt,
-            )
-
-            raw = (response.output_text or "").strip()
-            lines = [ln.strip() for ln in raw.splitlines() if ln.strip()]
-
-            # Match each summary sentence with a status line
-            for sent_obj, line in zip(rec.summary_sentences, lines):
-                # STATUS is before the first '|'
-                status_token = line.split("|", 1)[0].strip()
-                if status_token not in {"Verified", "Partially verified", "Not verified"}:
-                    status_token = "Partially verified"
-                sent_obj.status = status_token
-
-            # For any leftover sentences (if model returned fewer lines), set default
-            for sent_obj in rec.summary_sentences[len(lines):]:
-                if not sent_obj.status:
-                    sent_obj.status = "Partially verified"
-
+            if result.error is not None:
+                raise result.error
+            _apply_verification(rec, result.text, sentences)
         except Exception as e:
-            print(f"[verify_all] Error verifying {rec.country}: {repr(e)}")
-            # Conservative fallback: mark as partially verified
-            for s in rec.summary_sentences:
-                if not s.status:
-                    s.status = "Partially verified"
+            _apply_verification_fallback(rec, e)
+        if on_record:
+            on_record(rec)
 
     return records
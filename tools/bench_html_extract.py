@@ -0,0 +1,71 @@
+"""
+Benchmark the HTML extractors on a local corpus of saved pages.
+
+Usage:
+    python -m tools.bench_html_extract path/to/html_dir [--repeat 3] [--extractors bs4,lxml,lxml-main]
+
+Every *.html / *.htm file under the directory is parsed by each extractor.
+Reports throughput (MB/s, pages/s) and the average output length in characters,
+which is what ends up in the summarization / verification prompt budget.
+"""
+import argparse
+import os
+import time
+from typing import List
+
+from src import extractors
+
+
+def _load_corpus(root: str) -> List[str]:
+    pages = []
+    for dirpath, _, filenames in os.walk(root):
+        for name in sorted(filenames):
+            if name.lower().endswith((".html", ".htm")):
+                with open(os.path.join(dirpath, name), "rb") as f:
+                    pages.append(f.read().decode("utf-8", errors="replace"))
+    return pages
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("corpus", help="directory containing saved HTML pages")
+    parser.add_argument("--repeat", type=int, default=3, help="passes over the corpus")
+    parser.add_argument(
+        "--extractors",
+        default=",".join(extractors.available_html_extractors()),
+        help="comma-separated extractor names",
+    )
+    args = parser.parse_args()
+
+    pages = _load_corpus(args.corpus)
+    if not pages:
+        raise SystemExit(f"No .html files found under {args.corpus}")
+    total_mb = sum(len(p.encode("utf-8")) for p in pages) / 1e6
+
+    print(f"{len(pages)} pages, {total_mb:.2f} MB, {args.repeat} passes\n")
+    print(f"{'extractor':<12}{'MB/s':>10}{'pages/s':>10}{'avg chars':>12}{'vs bs4':>9}")
+
+    baseline_chars = None
+    for name in args.extractors.split(","):
+        extract = extractors.get_html_extractor(name.strip())
+
+        started = time.perf_counter()
+        for _ in range(args.repeat):
+            outputs = [extract(p) for p in pages]
+        elapsed = time.perf_counter() - started
+
+        avg_chars = sum(len(o) for o in outputs) / len(outputs)
+        if baseline_chars is None and name.strip() == "bs4":
+            baseline_chars = avg_chars
+        ratio = f"{avg_chars / baseline_chars:.2f}x" if baseline_chars else "-"
+        print(
+            f"{name.strip():<12}"
+            f"{total_mb * args.repeat / elapsed:>10.2f}"
+            f"{len(pages) * args.repeat / elapsed:>10.1f}"
+            f"{avg_chars:>12.0f}"
+            f"{ratio:>9}"
+        )
+
+
+if __name__ == "__main__":
+    main()
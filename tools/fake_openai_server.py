@@ -0,0 +1,318 @@
+"""
+Minimal local stand-in for the OpenAI Responses API, for offline runs.
+
+Usage:
+    python -m tools.fake_openai_server [--port 8765] [--latency 0.2] [--rate-limit-every 0]
+
+Then point the pipeline at it:
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=fake python -m src.main
+
+Also implements the Batch API subset used by LLM_MODE=batch (file upload,
+batch create / retrieve, file content); batches report "in_progress" on the
+first poll and "completed" afterwards.
+
+Answers are deterministic and shaped like the real prompts expect:
+- verification prompts (full text or per-sentence passages) get one
+  "Verified | ..." line per numbered sentence,
+- fused summarize-and-verify prompts get JSON sentences quoting the source,
+- strategy-list prompts get "Country | Strategy" lines,
+- everything else gets the first sentences of the quoted text.
+Requests with "stream": true get server-sent events (text deltas, then
+response.completed), with the latency spread over the deltas.
+`--rate-limit-every N` answers every Nth request with a 429 + Retry-After.
+"""
+import argparse
+import json
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def _estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def fake_answer(instructions: str, prompt: str) -> str:
+    if "Summary sentences to verify" in prompt:
+        block = prompt.split("Summary sentences to verify:", 1)[-1]
+        n = len(re.findall(r"^\s*\d+\.\s", block, flags=re.MULTILINE)) or 1
+        return "\n".join("Verified | found in the fake source text" for _ in range(n))
+
+    if "Passages:" in prompt:
+        n = len(re.findall(r"^\d+\.\s", prompt, flags=re.MULTILINE)) or 1
+        return "\n".join("Verified | supported by the given passage" for _ in range(n))
+
+    if '"supporting_quote"' in prompt:
+        quoted = re.findall(r'"""(.*?)"""', prompt, flags=re.DOTALL)
+        source = " ".join((quoted[-1] if quoted else "").split())
+        sentences = [s.strip() for s in re.split(r"(?<=[.!?])\s+", source) if s.strip()]
+        return json.dumps({"sentences": [
+            {"sentence": s, "supporting_quote": s, "status": "Verified"} for s in sentences[:3]
+        ]})
+
+    if "Country name | Strategy" in prompt:
+        return (
+            "Germany | National Sustainable Mobility Strategy\n"
+            "Japan | Next-Generation Mobility Strategy\n"
+            "France | Mobility Orientation Law"
+        )
+
+    quoted = re.findall(r'"""(.*?)"""', prompt, flags=re.DOTALL)
+    source = quoted[-1] if quoted else prompt
+    sentences = [s.strip() for s in re.split(r"(?<=[.!?])\s+", " ".join(source.split())) if s.strip()]
+    return "\n".join(sentences[:3]) or "The strategy text is empty."
+
+
+def response_body(model: str, text: str, input_tokens: int) -> dict:
+    output_tokens = _estimate_tokens(text)
+    return {
+        "id": f"resp_{uuid.uuid4().hex}",
+        "object": "response",
+        "created_at": int(time.time()),
+        "status": "completed",
+        "model": model,
+        "output": [
+            {
+                "type": "message",
+                "id": f"msg_{uuid.uuid4().hex}",
+                "status": "completed",
+                "role": "assistant",
+                "content": [{"type": "output_text", "text": text, "annotations": []}],
+            }
+        ],
+        "parallel_tool_calls": True,
+        "tool_choice": "auto",
+        "tools": [],
+        "usage": {
+            "input_tokens": input_tokens,
+            "input_tokens_details": {"cached_tokens": 0},
+            "output_tokens": output_tokens,
+            "output_tokens_details": {"reasoning_tokens": 0},
+            "total_tokens": input_tokens + output_tokens,
+        },
+    }
+
+
+def _parse_multipart_file(content_type: str, body: bytes) -> bytes:
+    """Return the bytes of the `file` part of a multipart/form-data body."""
+    boundary = content_type.split("boundary=", 1)[1].strip('"').encode()
+    for part in body.split(b"--" + boundary):
+        head, _, data = part.partition(b"\r\n\r\n")
+        if b'name="file"' in head:
+            return data[: -2] if data.endswith(b"\r\n") else data
+    return b""
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    latency = 0.0
+    rate_limit_every = 0
+    _count = 0
+    _count_lock = threading.Lock()
+
+    # Batch API state: file id -> (metadata, content), batch id -> batch object
+    files = {}
+    batches = {}
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def _send_json(self, status: int, payload: dict, headers: dict = None) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self) -> dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def do_POST(self) -> None:
+        path = self.path.split("?", 1)[0].rstrip("/")
+        if path.endswith("/responses"):
+            return self._responses(self._read_json())
+        if path.endswith("/files"):
+            return self._upload_file()
+        if path.endswith("/batches"):
+            return self._create_batch(self._read_json())
+        self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+
+    def do_GET(self) -> None:
+        parts = self.path.split("?", 1)[0].strip("/").split("/")
+        if len(parts) >= 3 and parts[-3] == "files" and parts[-1] == "content":
+            return self._file_content(parts[-2])
+        if len(parts) >= 2 and parts[-2] == "batches":
+            return self._retrieve_batch(parts[-1])
+        self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+
+    # -- Batch API -----------------------------------------------------------
+
+    def _store_file(self, content: bytes, purpose: str, filename: str) -> dict:
+        meta = {
+            "id": f"file-{uuid.uuid4().hex}",
+            "object": "file",
+            "bytes": len(content),
+            "created_at": int(time.time()),
+            "filename": filename,
+            "purpose": purpose,
+            "status": "processed",
+        }
+        type(self).files[meta["id"]] = (meta, content)
+        return meta
+
+    def _upload_file(self) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        content = _parse_multipart_file(self.headers.get("Content-Type", ""), self.rfile.read(length))
+        self._send_json(200, self._store_file(content, "batch", "batch.jsonl"))
+
+    def _create_batch(self, payload: dict) -> None:
+        batch = {
+            "id": f"batch_{uuid.uuid4().hex}",
+            "object": "batch",
+            "endpoint": payload.get("endpoint"),
+            "input_file_id": payload.get("input_file_id"),
+            "completion_window": payload.get("completion_window", "24h"),
+            "status": "validating",
+            "created_at": int(time.time()),
+            "output_file_id": None,
+            "error_file_id": None,
+            "request_counts": {"total": 0, "completed": 0, "failed": 0},
+        }
+        type(self).batches[batch["id"]] = batch
+        self._send_json(200, batch)
+
+    def _retrieve_batch(self, batch_id: str) -> None:
+        batch = type(self).batches.get(batch_id)
+        if batch is None:
+            return self._send_json(404, {"error": {"message": "No such batch"}})
+
+        if batch["status"] == "validating":
+            batch["status"] = "in_progress"
+        elif batch["status"] == "in_progress":
+            self._run_batch(batch)
+        self._send_json(200, batch)
+
+    def _run_batch(self, batch: dict) -> None:
+        _, content = type(self).files[batch["input_file_id"]]
+        lines = []
+        for raw in content.decode("utf-8").splitlines():
+            if not raw.strip():
+                continue
+            entry = json.loads(raw)
+            body = entry.get("body") or {}
+            instructions = body.get("instructions") or ""
+            prompt = body.get("input") or ""
+            text = fake_answer(instructions, prompt)
+            lines.append(json.dumps({
+                "id": f"batch_req_{uuid.uuid4().hex}",
+                "custom_id": entry.get("custom_id"),
+                "response": {
+                    "status_code": 200,
+                    "request_id": uuid.uuid4().hex,
+                    "body": response_body(body.get("model", "fake"), text, _estimate_tokens(instructions + prompt)),
+                },
+                "error": None,
+            }))
+
+        output = self._store_file("\n".join(lines).encode("utf-8"), "batch_output", "output.jsonl")
+        batch.update(
+            status="completed",
+            output_file_id=output["id"],
+            request_counts={"total": len(lines), "completed": len(lines), "failed": 0},
+        )
+
+    def _file_content(self, file_id: str) -> None:
+        stored = type(self).files.get(file_id)
+        if stored is None:
+            return self._send_json(404, {"error": {"message": "No such file"}})
+        content = stored[1]
+        self.send_response(200)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    # -- Responses API -------------------------------------------------------
+
+    def _responses(self, payload: dict) -> None:
+        cls = type(self)
+        with cls._count_lock:
+            cls._count += 1
+            count = cls._count
+
+        if cls.rate_limit_every and count % cls.rate_limit_every == 0:
+            return self._send_json(
+                429,
+                {"error": {"message": "Rate limit reached (fake)", "type": "requests"}},
+                {"Retry-After": "1"},
+            )
+
+        instructions = payload.get("instructions") or ""
+        prompt = payload.get("input") or ""
+        if not isinstance(prompt, str):
+            prompt = json.dumps(prompt)
+
+        text = fake_answer(instructions, prompt)
+        body = response_body(payload.get("model", "fake"), text, _estimate_tokens(instructions + prompt))
+        if payload.get("stream"):
+            return self._stream(body, text)
+        time.sleep(cls.latency)
+        self._send_json(200, body)
+
+    def _stream(self, body: dict, text: str) -> None:
+        """Server-sent events: the latency is spread over word-sized deltas."""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+
+        deltas = re.findall(r"\S+\s*", text) or [text]
+        item_id = body["output"][0]["id"]
+        events = [{"type": "response.created", "response": dict(body, status="in_progress", output=[])}]
+        events += [
+            {"type": "response.output_text.delta", "item_id": item_id, "output_index": 0,
+             "content_index": 0, "delta": delta, "logprobs": []}
+            for delta in deltas
+        ]
+        events.append({"type": "response.completed", "response": body})
+
+        for seq, event in enumerate(events):
+            if event["type"] == "response.output_text.delta":
+                time.sleep(type(self).latency / len(deltas))
+            event["sequence_number"] = seq
+            data = f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+            self.wfile.write(data.encode("utf-8"))
+            self.wfile.flush()
+
+
+def serve(port: int = 8765, latency: float = 0.0, rate_limit_every: int = 0) -> ThreadingHTTPServer:
+    """Start the fake server on a background thread and return it."""
+    FakeOpenAIHandler.latency = latency
+    FakeOpenAIHandler.rate_limit_every = rate_limit_every
+    server = ThreadingHTTPServer(("127.0.0.1", port), FakeOpenAIHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Fake OpenAI Responses API for offline runs")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added per response")
+    parser.add_argument("--rate-limit-every", type=int, default=0, help="429 every Nth request")
+    args = parser.parse_args()
+
+    server = serve(args.port, args.latency, args.rate_limit_every)
+    print(f"Fake OpenAI API listening on http://127.0.0.1:{server.server_address[1]}/v1")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
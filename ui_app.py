@@ -8,8 +8,11 @@ from src import (
     scrape,
     summarize,
     verify,
-    export_excel
+    export_excel,
+    metrics,
+    pipeline,
 )
+from src.config import SUMMARY_MODE, METRICS_PORT, PIPELINE_MODE, LLM_MODE
 
 st.set_page_config(page_title="Deep Search & Verification Agent", layout="wide")
 
@@ -24,6 +27,9 @@ if st.button("Run Deep Search Pipeline"):
         st.error("Please enter a research request.")
         st.stop()
 
+    metrics.reset()
+    metrics.start_metrics_server(METRICS_PORT)
+
     with st.spinner("Clarifying research focus..."):
         focus = scope.clarify_research_focus(user_request)
 
@@ -41,31 +47,31 @@ if st.button("Run Deep Search Pipeline"):
     )
     st.dataframe(strategy_table)
 
-    # ---- Populating Links ----
-    with st.spinner("Identifying links using web search..."):
-        records = search_links.populate_links(records)
-
-    st.subheader("🔗 Identified Links")
-    link_table = pd.DataFrame(
-        [[r.country, r.strategy_name, r.primary_link] for r in records],
-        columns=["Country", "Strategy", "Primary Link"],
-    )
-    st.dataframe(link_table)
+    # Streaming mode: every record goes search → scrape → summarize → verify
+    # on its own, so the link table below is skipped
+    streaming = PIPELINE_MODE == "streaming" and LLM_MODE != "batch"
 
-    # ---- Scrape ----
-    with st.spinner("Scraping content..."):
-        records = scrape.fetch_all(records)
+    if not streaming:
+        # ---- Populating Links ----
+        with st.spinner("Identifying links using web search..."):
+            records = search_links.populate_links(records)
 
-    # ---- Summaries ----
-    with st.spinner("Generating summaries..."):
-        records = summarize.summarize_all(records)
+        st.subheader("🔗 Identified Links")
+        link_table = pd.DataFrame(
+            [[r.country, r.strategy_name, r.primary_link] for r in records],
+            columns=["Country", "Strategy", "Primary Link"],
+        )
+        st.dataframe(link_table)
 
-    # ---- Verification ----
-    with st.spinner("Verifying summaries..."):
-        records = verify.verify_all(records)
+        # ---- Scrape ----
+        with st.spinner("Scraping content..."):
+            records = scrape.fetch_all(records)
 
-    # Table for summary & verification
+    # Table for summary & verification, filled in row by row as results stream in
     st.subheader("📝 Summary & Verification Results")
+    results_placeholder = st.empty()
+    preview = {}  # id(record) -> summary lines streamed so far
+
     def _summary_text(s):
     # Try multiple possible attribute names, fall back to str(s)
      return (
@@ -77,29 +83,72 @@ if st.button("Run Deep Search Pipeline"):
     def _status_text(s):
         return getattr(s, "status", None)
 
-    results_table = pd.DataFrame(
-    [
+    def _render_results(_rec=None):
+        results_table = pd.DataFrame(
         [
-            r.country,
-            r.strategy_name,
-            r.primary_link,
-            "\n".join([_summary_text(s) for s in r.summary_sentences]),
-            ", ".join(
-                sorted(
-                    {st for st in (_status_text(s) for s in r.summary_sentences) if st}
-                )
-            ),
-        ]
-        for r in records
-    ],
-    columns=["Country", "Strategy", "Link", "Summary", "Verification Status"],
-)
-
-    st.dataframe(results_table)
+            [
+                r.country,
+                r.strategy_name,
+                r.primary_link,
+                "\n".join(
+                    [_summary_text(s) for s in r.summary_sentences]
+                    or preview.get(id(r), [])
+                ),
+                ", ".join(
+                    sorted(
+                        {st for st in (_status_text(s) for s in r.summary_sentences) if st}
+                    )
+                ),
+            ]
+            for r in records
+        ],
+        columns=["Country", "Strategy", "Link", "Summary", "Verification Status"],
+    )
+        results_placeholder.dataframe(results_table)
+
+    def _on_sentence(rec, sentence):
+        preview.setdefault(id(rec), []).append(sentence)
+        _render_results()
+
+    def _on_restart(rec):
+        preview.pop(id(rec), None)
+        _render_results()
+
+    _render_results()
+    if streaming:
+        # ---- Search, scrape, summarize, verify per record ----
+        with st.spinner("Running the per-record pipeline..."):
+            records = pipeline.research_pipeline(focus).run(
+                records, on_progress=lambda _stage, rec: _render_results(rec)
+            )
+    elif SUMMARY_MODE == "fused":
+        # ---- Summaries + Verification (one call per strategy) ----
+        with st.spinner("Generating and verifying summaries..."):
+            records = summarize.summarize_and_verify_all(records, focus, on_record=_render_results)
+    else:
+        # ---- Summaries ----
+        with st.spinner("Generating summaries..."):
+            records = summarize.summarize_all(
+                records,
+                focus,
+                on_sentence=_on_sentence,
+                on_record=_render_results,
+                on_restart=_on_restart,
+            )
+
+        # ---- Verification ----
+        with st.spinner("Verifying summaries..."):
+            records = verify.verify_all(records, focus, on_record=_render_results)
+    _render_results()
 
     # ---- Export ----
     export_excel.export_to_excel(records)
     st.success("Excel file generated successfully!")
+
+    # ---- Run summary ----
+    st.subheader("⏱️ Run Summary")
+    st.dataframe(pd.DataFrame(metrics.summary_rows()))
+    metrics.write_report()
     with open("deep_search_results.xlsx", "rb") as f:
         st.download_button(
             label="⬇️ Download Excel",